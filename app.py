@@ -1,42 +1,434 @@
 import sys
 import os
+import ast
+import collections
+import hashlib
+import functools
+import heapq
+import unicodedata
 import pandas as pd
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, 
                              QMessageBox, QComboBox, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QFrame, QStatusBar, QScrollArea)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QFont, QColor, QBrush
+                             QHeaderView, QFrame, QStatusBar, QScrollArea, QCheckBox, QCompleter)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QFileSystemWatcher, QTimer, QSettings, QRect
+from PyQt5.QtGui import QFont, QColor, QBrush, QPainter
 
 class ProcessThread(QThread):
     """Thread para processar os dados sem congelar a interface."""
-    finished = pyqtSignal(pd.DataFrame, str)
+    finished = pyqtSignal(pd.DataFrame, str, object)
     error = pyqtSignal(str)
     
-    def __init__(self, app, output_path):
+    def __init__(self, app, output_path, modo=None):
         super().__init__()
         self.app = app
         self.output_path = output_path
+        self.modo = modo or MODO_TRES_FASES
+        # Planilhas lidas no início: a thread não consulta o estado da janela durante o processamento
+        self.planilhas = (app.notas_df, app.inscricoes_df, app.vagas_df)
         
     def run(self):
         try:
-            resultado_df = self.app.processar_classificacoes()
+            # O novo estado só é aplicado à janela em on_process_finished, na thread da interface
+            resultado_df, processamento = self.app.processar_classificacoes(self.modo, *self.planilhas)
             
             # Tentar salvar com tratamento de erro específico para permissão
             try:
-                resultado_df.to_excel(self.output_path, sheet_name='Classificação', index=False)
+                self.app.salvar_resultado(resultado_df, self.output_path, processamento)
             except PermissionError:
                 # Se falhar por causa de permissão, tente salvar em um local alternativo
                 home_dir = os.path.expanduser("~")
                 fallback_path = os.path.join(home_dir, "resultado_monitoria.xlsx")
-                resultado_df.to_excel(fallback_path, sheet_name='Classificação', index=False)
+                self.app.salvar_resultado(resultado_df, fallback_path, processamento)
                 self.output_path = fallback_path  # Atualiza o caminho
                 
-            self.finished.emit(resultado_df, self.output_path)
+            self.finished.emit(resultado_df, self.output_path, processamento)
         except Exception as e:
             self.error.emit(str(e))
 
+def caminho_rastreamento(output_path):
+    return os.path.splitext(output_path)[0] + "_rastreamento.csv"
+
+OPCOES = ['PRIMEIRA OPCAO', 'SEGUNDA OPCAO', 'TERCEIRA OPCAO']
+MODO_TRES_FASES = 'Três fases (padrão)'
+MODO_ACEITACAO_ADIADA = 'Aceitação adiada (estudante propõe)'
+SITUACAO_NESTA_DISCIPLINA = 'Classificado nesta disciplina'
+SITUACAO_OUTRA_DISCIPLINA = 'Classificado em outra disciplina'
+SITUACAO_DESISTENCIA = 'Desistência registrada'
+SITUACOES_RASTREAMENTO = [
+    SITUACAO_NESTA_DISCIPLINA,
+    SITUACAO_OUTRA_DISCIPLINA,
+    'Disciplina não consta na planilha de vagas',
+    'Disciplina sem vagas restantes',
+    'Fora do número de vagas',
+    'Dentro das vagas, mas a opção não era aceita nesta fase',
+    SITUACAO_DESISTENCIA
+]
+COLUNAS_CANDIDATURA = ['NOME', 'MATRICULA', 'DISCIPLINA', 'MEDIA_CLASSIFICATORIA',
+                       'OPCAO', 'NOTA_DISCIPLINA', 'MEDIA_GLOBAL']
+FAIXAS_DISTRIBUICAO_NOTAS = 10  # Faixas do histograma de notas no painel por disciplina
+ORDENACOES_PAINEL = ['Disciplina', 'Menor preenchimento', 'Mais candidatos']
+
+class FormulaClassificatoria:
+    """Expressão aritmética restrita para a média classificatória, avaliada sobre colunas inteiras."""
+    # Outras colunas da planilha de notas podem ser usadas com nota("Nome da Coluna")
+    FORMULA_PADRAO = "(2 * NOTA_DISCIPLINA + MEDIA_GLOBAL) / 3"
+    VARIAVEIS = ('NOTA_DISCIPLINA', 'MEDIA_GLOBAL', 'OPCAO',
+                 'PRIMEIRA_OPCAO', 'SEGUNDA_OPCAO', 'TERCEIRA_OPCAO')
+    FUNCOES = {
+        'min': lambda *args: functools.reduce(np.minimum, args),
+        'max': lambda *args: functools.reduce(np.maximum, args),
+        'abs': np.abs,
+        'round': np.round
+    }
+    OPERADORES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+    def __init__(self, expressao):
+        self.expressao = expressao.strip()
+        self.colunas_notas = []  # Colunas extras da planilha de notas, na ordem de uso
+
+        try:
+            arvore = ast.parse(self.expressao, mode='eval')
+        except SyntaxError:
+            raise ValueError(f"Fórmula inválida: {self.expressao}")
+
+        arvore = self._validar(arvore)
+        self.variaveis = sorted({no.id for no in ast.walk(arvore)
+                                 if isinstance(no, ast.Name) and no.id in self.VARIAVEIS})
+        self.codigo = compile(ast.fix_missing_locations(arvore), '<formula>', 'eval')
+
+    def _validar(self, no):
+        # Substituir nota("Coluna") por uma variável interna ligada à coluna
+        if (isinstance(no, ast.Call) and isinstance(no.func, ast.Name) and no.func.id == 'nota'):
+            if len(no.args) != 1 or no.keywords or not isinstance(no.args[0], ast.Constant) \
+                    or not isinstance(no.args[0].value, str):
+                raise ValueError('Use nota("Nome da Coluna") com o nome da coluna entre aspas.')
+            coluna = no.args[0].value
+            if coluna not in self.colunas_notas:
+                self.colunas_notas.append(coluna)
+            return ast.copy_location(ast.Name(id=f"_nota_{self.colunas_notas.index(coluna)}", ctx=ast.Load()), no)
+
+        if isinstance(no, ast.Call):
+            if not isinstance(no.func, ast.Name) or no.func.id not in self.FUNCOES or no.keywords:
+                raise ValueError(f"Função não permitida na fórmula: {ast.unparse(no.func)}")
+            self._validar_argumentos(no.func.id, no.args)
+            # As casas decimais de round() ficam como estão (inteiro já validado)
+            validar = no.args[:1] if no.func.id == 'round' else no.args
+            no.args = [self._validar(arg) for arg in validar] + no.args[len(validar):]
+            return no
+        if isinstance(no, ast.Name):
+            if no.id not in self.VARIAVEIS:
+                raise ValueError(f"Variável desconhecida na fórmula: {no.id}")
+            return no
+        if isinstance(no, ast.Constant):
+            if isinstance(no.value, bool) or not isinstance(no.value, (int, float)):
+                raise ValueError(f"Valor não permitido na fórmula: {no.value!r}")
+            # Constantes como float: 10 ** 1000 ** 1000 estoura em vez de travar calculando um inteiro enorme
+            return ast.copy_location(ast.Constant(value=float(no.value)), no)
+        if isinstance(no, (ast.Expression, ast.BinOp, ast.UnaryOp)):
+            if isinstance(no, ast.BinOp) and not isinstance(no.op, self.OPERADORES):
+                raise ValueError("Operador não permitido na fórmula.")
+            if isinstance(no, ast.UnaryOp) and not isinstance(no.op, self.OPERADORES):
+                raise ValueError("Operador não permitido na fórmula.")
+            for campo, valor in ast.iter_fields(no):
+                if isinstance(valor, ast.AST) and not isinstance(valor, (ast.operator, ast.unaryop)):
+                    setattr(no, campo, self._validar(valor))
+            return no
+        raise ValueError(f"Elemento não permitido na fórmula: {ast.unparse(no)}")
+
+    def _validar_argumentos(self, funcao, args):
+        # Número de argumentos conferido aqui para que a fórmula não falhe só na avaliação
+        if funcao in ('min', 'max') and len(args) < 2:
+            raise ValueError(f"{funcao}() precisa de pelo menos dois argumentos.")
+        if funcao == 'abs' and len(args) != 1:
+            raise ValueError("abs() recebe exatamente um argumento.")
+        if funcao == 'round':
+            casas = args[1] if len(args) == 2 else None
+            if len(args) not in (1, 2) or (casas is not None and not (
+                    isinstance(casas, ast.Constant) and isinstance(casas.value, int)
+                    and not isinstance(casas.value, bool))):
+                raise ValueError("round() recebe um valor e, opcionalmente, um número inteiro de casas decimais.")
+
+    def avaliar(self, candidaturas, notas_df):
+        # Calcula a fórmula para todas as linhas de candidaturas de uma vez
+        num_opcao = candidaturas['NUM_OPCAO'].to_numpy()
+        colunas = {
+            'NOTA_DISCIPLINA': lambda: candidaturas['NOTA_DISCIPLINA'].to_numpy(dtype=float),
+            'MEDIA_GLOBAL': lambda: candidaturas['MEDIA_GLOBAL'].to_numpy(dtype=float),
+            'OPCAO': lambda: num_opcao.astype(float),
+            'PRIMEIRA_OPCAO': lambda: (num_opcao == 1).astype(float),
+            'SEGUNDA_OPCAO': lambda: (num_opcao == 2).astype(float),
+            'TERCEIRA_OPCAO': lambda: (num_opcao == 3).astype(float)
+        }
+        namespace = dict(self.FUNCOES)
+        namespace.update({nome: colunas[nome]() for nome in self.variaveis})
+
+        linhas_notas = candidaturas['LINHA_NOTAS'].to_numpy()
+        for i, coluna in enumerate(self.colunas_notas):
+            if coluna not in notas_df.columns:
+                raise ValueError(f"A coluna '{coluna}' usada na fórmula não existe na planilha de notas.")
+            namespace[f"_nota_{i}"] = notas_df[coluna].to_numpy(dtype=float)[linhas_notas]
+
+        try:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resultado = eval(self.codigo, {'__builtins__': {}}, namespace)
+            return np.broadcast_to(np.asarray(resultado, dtype=float), len(candidaturas)).copy()
+        except Exception as e:
+            raise ValueError(f"Erro ao calcular a fórmula {self.expressao}: {str(e)}")
+
+def normalizar_nome(nome):
+    # Sem acentos, sem diferença entre maiúsculas e minúsculas e com espaços simples
+    texto = unicodedata.normalize('NFKD', str(nome))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+def normalizar_matricula(matricula):
+    if pd.isna(matricula):
+        return None
+    # O Excel pode trazer 2023001 como 2023001.0
+    if isinstance(matricula, float) and matricula.is_integer():
+        matricula = int(matricula)
+    return str(matricula).strip() or None
+
+def trigramas(nome_normalizado):
+    texto = f"  {nome_normalizado} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class CorrespondenciaEstudantes:
+    """Associa os estudantes das inscrições às linhas da planilha de notas."""
+    # Ordem de tentativa: matrícula, nome exato, nome normalizado e nome aproximado por trigramas
+    LIMIAR_SUGESTAO = 0.6  # Similaridade mínima para sugerir um nome aproximado
+    LIMIAR_REVISAO = 0.85  # Abaixo disso o nome aproximado só é sugerido, não usado
+    MAX_CANDIDATOS = 20  # Candidatos comparados por consulta no índice de trigramas
+    MAX_POSTAGENS = 5000  # Entradas do índice percorridas por consulta
+
+    def __init__(self, notas_df):
+        self.notas_df = notas_df
+        
+        # Primeira ocorrência de cada nome e de cada matrícula
+        self.por_nome = {}
+        for linha, nome in enumerate(notas_df['ESTUDANTE'].tolist()):
+            self.por_nome.setdefault(nome, linha)
+        self.por_matricula = {}
+        if 'MATRICULA' in notas_df.columns:
+            for linha, matricula in enumerate(notas_df['MATRICULA'].tolist()):
+                chave = normalizar_matricula(matricula)
+                if chave is not None:
+                    self.por_matricula.setdefault(chave, linha)
+        
+        # Índices montados apenas quando algum nome não bate exatamente
+        self.por_nome_normalizado = None
+        self.indice_trigramas = None
+        self.resolvidos = {}  # (nome, matrícula) -> (linha, método, similaridade)
+        self.sugestoes = {}  # (nome, matrícula) -> linha sugerida para nomes não confirmados
+
+    def montar_indice_normalizado(self):
+        self.por_nome_normalizado = {}
+        for nome, linha in self.por_nome.items():
+            self.por_nome_normalizado.setdefault(normalizar_nome(nome), linha)
+
+    def montar_indice_trigramas(self):
+        self.nomes_indexados = list(self.por_nome_normalizado.keys())
+        self.trigramas_indexados = [trigramas(nome) for nome in self.nomes_indexados]
+        self.indice_trigramas = {}
+        for i, tris in enumerate(self.trigramas_indexados):
+            for tri in tris:
+                self.indice_trigramas.setdefault(tri, []).append(i)
+
+    def aproximar(self, nome_normalizado):
+        if self.indice_trigramas is None:
+            self.montar_indice_trigramas()
+        
+        # Os candidatos vêm dos trigramas mais raros do nome, até um limite de postagens:
+        # trigramas comuns (" da", "de ") aparecem em milhares de nomes e não ajudam a filtrar
+        tris = trigramas(nome_normalizado)
+        contagem = collections.Counter()
+        examinadas = 0
+        for n, tri in enumerate(sorted(tris, key=lambda tri: len(self.indice_trigramas.get(tri, ())))):
+            postagens = self.indice_trigramas.get(tri, ())
+            if n >= 3 and examinadas + len(postagens) > self.MAX_POSTAGENS:
+                break
+            contagem.update(postagens)
+            examinadas += len(postagens)
+        
+        # Similaridade de Dice apenas entre os candidatos mais promissores
+        candidatos = [i for i, _ in contagem.most_common(self.MAX_CANDIDATOS)]
+        pontuados = sorted(
+            ((2 * len(tris & self.trigramas_indexados[i]) / (len(tris) + len(self.trigramas_indexados[i])), i)
+             for i in candidatos),
+            reverse=True)
+        if not pontuados:
+            return -1, 0.0, False
+        
+        similaridade, melhor = pontuados[0]
+        ambiguo = len(pontuados) > 1 and similaridade - pontuados[1][0] < 0.02
+        return self.por_nome_normalizado[self.nomes_indexados[melhor]], similaridade, ambiguo
+
+    def resolver_nome(self, nome):
+        # (linha, método, similaridade, linha sugerida) usando só o nome
+        if nome in self.por_nome:
+            return self.por_nome[nome], 'Exato', 1.0, -1
+        if self.por_nome_normalizado is None:
+            self.montar_indice_normalizado()
+        nome_normalizado = normalizar_nome(nome)
+        if nome_normalizado in self.por_nome_normalizado:
+            return self.por_nome_normalizado[nome_normalizado], 'Nome normalizado', 1.0, -1
+        linha, similaridade, ambiguo = self.aproximar(nome_normalizado)
+        if linha < 0 or similaridade < self.LIMIAR_SUGESTAO:
+            return -1, 'Sem correspondência', similaridade, -1
+        if ambiguo or similaridade < self.LIMIAR_REVISAO:
+            # Dois nomes igualmente parecidos ou pouco semelhantes: usar as notas de
+            # outra pessoa seria pior do que deixar o estudante de fora
+            metodo = 'Aproximado (ambíguo)' if ambiguo else 'Aproximado (não confirmado)'
+            return -1, metodo, similaridade, linha
+        return linha, 'Aproximado', similaridade, -1
+
+    def resolver(self, nome, matricula):
+        chave = (nome, matricula)
+        if chave in self.resolvidos:
+            return self.resolvidos[chave]
+        
+        matricula_normalizada = normalizar_matricula(matricula)
+        linha_matricula = self.por_matricula.get(matricula_normalizada, -1) if matricula_normalizada is not None else -1
+        nome_matricula = self.notas_df['ESTUDANTE'].iat[linha_matricula] if linha_matricula >= 0 else None
+        if linha_matricula >= 0 and (nome_matricula == nome or normalizar_nome(nome_matricula) == normalizar_nome(nome)):
+            resultado = (linha_matricula, 'Matrícula', 1.0)
+        else:
+            linha, metodo, similaridade, sugerida = self.resolver_nome(nome)
+            if linha_matricula >= 0 and linha == linha_matricula:
+                metodo = 'Matrícula (nome aproximado)'
+            elif linha_matricula >= 0 and linha >= 0:
+                # O nome confirma outra linha: a matrícula provavelmente foi digitada errada
+                metodo += ' (matrícula divergente)'
+            elif linha_matricula >= 0:
+                # Nem o nome confirma a linha da matrícula: fica só como sugestão
+                tris_a, tris_b = trigramas(normalizar_nome(nome)), trigramas(normalizar_nome(nome_matricula))
+                metodo, similaridade = 'Matrícula (nome diferente)', 2 * len(tris_a & tris_b) / (len(tris_a) + len(tris_b))
+                sugerida = linha_matricula
+            if sugerida >= 0:
+                self.sugestoes[chave] = sugerida
+            resultado = (linha, metodo, similaridade)
+        
+        self.resolvidos[chave] = resultado
+        return resultado
+
+    def localizar(self, nomes, matriculas):
+        # Linha da planilha de notas de cada estudante (-1 quando não há correspondência)
+        codigos, pares = pd.MultiIndex.from_arrays([np.asarray(nomes, dtype=object),
+                                                    np.asarray(matriculas, dtype=object)]).factorize()
+        linhas = np.array([self.resolver(nome, matricula)[0] for nome, matricula in pares], dtype=np.int64)
+        return linhas[codigos]
+
+    def relatorio(self, nomes, matriculas):
+        # Correspondências que não foram exatas, marcando as que precisam de revisão
+        linhas = []
+        for nome, matricula in dict.fromkeys(zip(nomes, matriculas)):
+            linha, metodo, similaridade = self.resolver(nome, matricula)
+            if metodo in ('Exato', 'Matrícula'):
+                continue
+            sugerida = self.sugestoes.get((nome, matricula), -1) if linha < 0 else linha
+            linhas.append({
+                'Nome na Inscrição': nome,
+                'Matrícula': matricula,
+                'Nome nas Notas': self.notas_df['ESTUDANTE'].iat[sugerida] if sugerida >= 0 else None,
+                'Método': metodo,
+                'Similaridade': round(similaridade, 3),
+                'Usada na Classificação': 'Sim' if linha >= 0 else 'Não',
+                'Revisar': 'Sim' if linha < 0 or similaridade < self.LIMIAR_REVISAO or 'divergente' in metodo else 'Não'
+            })
+        return pd.DataFrame(linhas, columns=['Nome na Inscrição', 'Matrícula', 'Nome nas Notas', 'Método',
+                                             'Similaridade', 'Usada na Classificação', 'Revisar'])
+
+class PainelEstatisticas(QWidget):
+    """Desenha os indicadores já calculados de cada disciplina, uma linha por disciplina."""
+    ALTURA_LINHA = 28
+    COLUNAS = [('Disciplina', 180), ('Preenchimento', 230), ('Nota de Corte', 130),
+               ('Candidatos por Opção', 240), ('Distribuição das Notas', 190)]
+    CORES_OPCOES = [QColor('#1976D2'), QColor('#64B5F6'), QColor('#BBDEFB')]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.estatisticas = None
+        self.ordem = np.array([], dtype=np.int64)
+        self.setMinimumWidth(sum(largura for _, largura in self.COLUNAS))
+
+    def definir_estatisticas(self, estatisticas, ordem):
+        self.estatisticas = estatisticas
+        self.ordem = ordem
+        self.setMinimumHeight(len(ordem) * self.ALTURA_LINHA)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+        painter.fillRect(area, Qt.white)
+        if self.estatisticas is not None and len(self.ordem):
+            # Só as linhas dentro da área exposta são pintadas
+            primeira = max(area.top() // self.ALTURA_LINHA, 0)
+            ultima = min(area.bottom() // self.ALTURA_LINHA + 1, len(self.ordem))
+            for linha in range(primeira, ultima):
+                self.desenhar_linha(painter, linha, self.ordem[linha])
+        painter.end()
+
+    def desenhar_linha(self, painter, linha, d):
+        est = self.estatisticas
+        altura = self.ALTURA_LINHA
+        y = linha * altura
+        if linha % 2:
+            painter.fillRect(0, y, self.width(), altura, QColor('#F5F5F5'))
+        larguras = [largura for _, largura in self.COLUNAS]
+        x = 0
+
+        # Nome da disciplina
+        texto = painter.fontMetrics().elidedText(str(est['disciplinas'][d]), Qt.ElideRight, larguras[0] - 8)
+        painter.setPen(Qt.black)
+        painter.drawText(QRect(x + 4, y, larguras[0] - 8, altura), Qt.AlignVCenter | Qt.AlignLeft, texto)
+        x += larguras[0]
+
+        # Barra de preenchimento das vagas
+        vagas = est['vagas'][d]
+        painter.fillRect(x + 4, y + 8, 100, altura - 16, QColor('#E0E0E0'))
+        if est['processado']:
+            preenchimento = est['preenchimento'][d]
+            if preenchimento > 0:
+                cor = QColor('#4CAF50') if preenchimento >= 1 else QColor('#FF9800')
+                painter.fillRect(x + 4, y + 8, int(100 * min(preenchimento, 1)), altura - 16, cor)
+            texto = f"{est['classificados'][d]}/{vagas}"
+            if vagas > 0:
+                texto += f" ({preenchimento:.0%})"
+        else:
+            texto = f"{vagas} vaga(s)"
+        painter.drawText(QRect(x + 110, y, larguras[1] - 114, altura), Qt.AlignVCenter | Qt.AlignLeft, texto)
+        x += larguras[1]
+
+        # Nota de corte: menor média classificatória entre os classificados
+        nota_corte = est['nota_corte'][d]
+        texto = "—" if np.isnan(nota_corte) else f"{nota_corte:.4f}"
+        painter.drawText(QRect(x + 4, y, larguras[2] - 8, altura), Qt.AlignVCenter | Qt.AlignRight, texto)
+        x += larguras[2]
+
+        # Candidatos por opção, em uma barra empilhada proporcional ao maior total
+        contagens = est['candidatos_opcao'][d]
+        escala = 110 / max(est['maximo_candidatos'], 1)
+        inicio = x + 8
+        for contagem, cor in zip(contagens, self.CORES_OPCOES):
+            largura = int(round(contagem * escala))
+            painter.fillRect(inicio, y + 8, largura, altura - 16, cor)
+            inicio += largura
+        painter.drawText(QRect(x + 124, y, larguras[3] - 124, altura), Qt.AlignVCenter | Qt.AlignLeft,
+                         " / ".join(str(c) for c in contagens))
+        x += larguras[3]
+
+        # Histograma das notas dos candidatos na disciplina
+        distribuicao = est['distribuicao_notas'][d]
+        maximo = distribuicao.max()
+        if maximo > 0:
+            largura = (larguras[4] - 8) // len(distribuicao)
+            for i, contagem in enumerate(distribuicao):
+                barra = int(round((altura - 8) * contagem / maximo))
+                painter.fillRect(x + 4 + i * largura, y + altura - 4 - barra, largura - 1, barra, QColor('#7E57C2'))
+
 class MonitoriaApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -47,6 +439,17 @@ class MonitoriaApp(QMainWindow):
         self.vagas_df = None
         self.resultado_df = None
         self.todas_candidaturas = None  # Nova variável para armazenar todas as candidaturas
+        self.candidaturas_processadas = None  # Candidaturas usadas no último processamento
+        self.rastreamento = None  # Rastreamento da alocação, alinhado a candidaturas_processadas
+        self.rastreamento_indice = None
+        self.comparacao_df = None  # Comparação entre os modos de alocação (aceitação adiada)
+        self.process_thread = None
+        self.estado_alocacao = None  # Estado da última alocação, usado nas chamadas seguintes
+        self.correspondencia = None  # Índice de nomes/matrículas da planilha de notas
+        self.correspondencias_df = None  # Correspondências não exatas entre inscrições e notas
+        self.ranking_completo = None  # Classificação de todas as disciplinas (cache)
+        self.ranking_limites = {}  # Disciplina -> (início, fim) em ranking_completo
+        self.estatisticas = None  # Indicadores por disciplina do painel, refeitos a cada carga ou processamento
         self.disciplinas = []  # Lista de disciplinas disponíveis
         
         # Variáveis para widgets críticos
@@ -56,6 +459,26 @@ class MonitoriaApp(QMainWindow):
         self.process_info = None
         self.highlight_legend = None  # Inicializar explicitamente para evitar erros
         
+        # Recarga automática: hash de cada planilha carregada e observador do arquivo
+        self.hashes_planilhas = {}
+        self.arquivo_carregado = None  # Arquivo lido em load_data; o campo de texto pode ter mudado depois
+        self.hashes_linhas = {}  # Hash de cada linha das planilhas, para refazer só o que mudou
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_excel_file_changed)
+        # Agrupa as várias notificações de um único salvamento em uma só recarga
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(1000)
+        self.reload_timer.timeout.connect(self.recarregar_dados_alterados)
+        
+        # Fórmula da média classificatória (a última usada fica salva nas configurações)
+        self.settings = QSettings("Podium", "Podium")
+        try:
+            self.formula = FormulaClassificatoria(
+                self.settings.value("formula", FormulaClassificatoria.FORMULA_PADRAO))
+        except ValueError:
+            self.formula = FormulaClassificatoria(FormulaClassificatoria.FORMULA_PADRAO)
+        
         # Configuração da janela principal
         self.setWindowTitle("Podium - Sistema de Classificação para Monitoria")
         self.setGeometry(100, 100, 1000, 800)
@@ -68,15 +491,21 @@ class MonitoriaApp(QMainWindow):
         self.import_tab = QWidget()
         self.view_tab = QWidget()
         self.ranking_tab = QWidget()  # Nova aba para classificação por disciplina
+        self.student_tab = QWidget()  # Consulta do rastreamento por estudante
+        self.dashboard_tab = QWidget()  # Painel de indicadores por disciplina
         
         self.tabs.addTab(self.import_tab, "Importar Dados")
         self.tabs.addTab(self.view_tab, "Visualizar Dados")
         self.tabs.addTab(self.ranking_tab, "Classificação por Disciplina")
+        self.tabs.addTab(self.student_tab, "Consulta por Estudante")
+        self.tabs.addTab(self.dashboard_tab, "Painel por Disciplina")
         
         # Configurar as abas
         self.setup_import_tab()
         self.setup_view_tab()
         self.setup_ranking_tab()
+        self.setup_student_tab()
+        self.setup_dashboard_tab()
         
         # Status bar
         self.status_bar = QStatusBar()
@@ -127,11 +556,16 @@ class MonitoriaApp(QMainWindow):
         import_layout.addLayout(file_layout)
         
         # Botão de carregar dados
-        load_btn = QPushButton("Carregar Dados")
-        load_btn.setFont(QFont("Arial", 12, QFont.Bold))
-        load_btn.setMinimumHeight(40)
-        load_btn.clicked.connect(self.load_data)
-        import_layout.addWidget(load_btn)
+        self.load_btn = QPushButton("Carregar Dados")
+        self.load_btn.setFont(QFont("Arial", 12, QFont.Bold))
+        self.load_btn.setMinimumHeight(40)
+        self.load_btn.clicked.connect(self.load_data)
+        import_layout.addWidget(self.load_btn)
+        
+        # Recarga automática quando o arquivo for salvo novamente
+        self.auto_reload_check = QCheckBox("Recarregar automaticamente quando o arquivo for alterado")
+        self.auto_reload_check.toggled.connect(self.toggle_auto_reload)
+        import_layout.addWidget(self.auto_reload_check)
         
         main_layout.addWidget(import_section)
         
@@ -161,6 +595,36 @@ class MonitoriaApp(QMainWindow):
         output_btn = QPushButton("Selecionar")
         output_btn.clicked.connect(self.select_output_file)
         
+        # Fórmula da média classificatória
+        formula_label = QLabel("Fórmula da média classificatória:")
+        self.formula_entry = QLineEdit(self.formula.expressao)
+        self.formula_entry.setToolTip(
+            "Variáveis: NOTA_DISCIPLINA, MEDIA_GLOBAL, OPCAO, PRIMEIRA_OPCAO, SEGUNDA_OPCAO, TERCEIRA_OPCAO.\n"
+            "Outras colunas da planilha de notas: nota(\"Nome da Coluna\"). Funções: min, max, abs, round.")
+        formula_btn = QPushButton("Aplicar Fórmula")
+        formula_btn.clicked.connect(self.apply_formula)
+        
+        formula_layout = QHBoxLayout()
+        formula_layout.addWidget(formula_label)
+        formula_layout.addWidget(self.formula_entry)
+        formula_layout.addWidget(formula_btn)
+        process_layout.addLayout(formula_layout)
+        
+        # Modo de alocação das vagas
+        mode_label = QLabel("Modo de alocação:")
+        self.mode_selector = QComboBox()
+        self.mode_selector.addItems([MODO_TRES_FASES, MODO_ACEITACAO_ADIADA])
+        self.mode_selector.setToolTip(
+            "Três fases: 1ª opção, depois 1ª e 2ª, depois qualquer opção, disciplina por disciplina.\n"
+            "Aceitação adiada: resultado estável que não depende da ordem das disciplinas; "
+            "inclui a comparação com o modo padrão.")
+        
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(mode_label)
+        mode_layout.addWidget(self.mode_selector)
+        mode_layout.addStretch()
+        process_layout.addLayout(mode_layout)
+        
         output_layout = QHBoxLayout()
         output_layout.addWidget(output_label)
         output_layout.addWidget(self.output_path_entry)
@@ -195,7 +659,8 @@ class MonitoriaApp(QMainWindow):
         combo_layout = QHBoxLayout()
         combo_label = QLabel("Selecione os dados para visualizar:")
         self.data_selector = QComboBox()
-        self.data_selector.addItems(["Notas", "Inscrições", "Vagas", "Resultado"])
+        self.data_selector.addItems(["Notas", "Inscrições", "Vagas", "Resultado", "Comparação de Modos",
+                                     "Correspondência de Nomes", "Chamadas"])
         self.data_selector.currentTextChanged.connect(self.change_dataset_view)
         
         combo_layout.addWidget(combo_label)
@@ -278,8 +743,119 @@ class MonitoriaApp(QMainWindow):
         self.ranking_info.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.ranking_info)
         
+        # Exportar a classificação de todas as disciplinas de uma vez
+        export_btn = QPushButton("Exportar Todas as Classificações")
+        export_btn.clicked.connect(self.export_all_rankings)
+        layout.addWidget(export_btn)
+        
         self.ranking_tab.setLayout(layout)
 
+    def setup_student_tab(self):
+        layout = QVBoxLayout()
+        
+        # Título
+        title_label = QLabel("Consulta por Estudante")
+        title_label.setFont(QFont("Arial", 14, QFont.Bold))
+        title_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title_label)
+        
+        # Campo de busca com sugestões de nomes
+        search_layout = QHBoxLayout()
+        search_label = QLabel("Estudante:")
+        self.student_entry = QLineEdit()
+        self.student_completer = QCompleter([])
+        self.student_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.student_completer.setFilterMode(Qt.MatchContains)
+        self.student_entry.setCompleter(self.student_completer)
+        self.student_entry.returnPressed.connect(self.show_student_trace)
+        search_btn = QPushButton("Consultar")
+        search_btn.clicked.connect(self.show_student_trace)
+        
+        search_layout.addWidget(search_label)
+        search_layout.addWidget(self.student_entry)
+        search_layout.addWidget(search_btn)
+        layout.addLayout(search_layout)
+        
+        # Tabela com uma linha por candidatura do estudante
+        self.student_table = QTableWidget(0, 0)
+        layout.addWidget(self.student_table)
+        
+        self.student_info = QLabel("Processe a classificação para consultar por que um estudante foi ou não classificado.")
+        self.student_info.setWordWrap(True)
+        self.student_info.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.student_info)
+        
+        # Separador
+        separator = QFrame()
+        separator.setFrameShape(QFrame.HLine)
+        separator.setFrameShadow(QFrame.Sunken)
+        layout.addWidget(separator)
+        
+        # ==== DESISTÊNCIAS E CHAMADAS ====
+        calls_title = QLabel("Desistências e Chamadas")
+        calls_title.setFont(QFont("Arial", 12, QFont.Bold))
+        layout.addWidget(calls_title)
+        
+        calls_layout = QHBoxLayout()
+        self.withdraw_btn = QPushButton("Registrar Desistência do Estudante")
+        self.withdraw_btn.clicked.connect(self.register_withdrawal)
+        self.call_btn = QPushButton("Realizar Nova Chamada")
+        self.call_btn.clicked.connect(self.next_call)
+        calls_layout.addWidget(self.withdraw_btn)
+        calls_layout.addWidget(self.call_btn)
+        layout.addLayout(calls_layout)
+        
+        self.call_info = QLabel("")
+        self.call_info.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.call_info)
+        
+        self.student_tab.setLayout(layout)
+
+    def setup_dashboard_tab(self):
+        layout = QVBoxLayout()
+        
+        # Título
+        title_label = QLabel("Painel por Disciplina")
+        title_label.setFont(QFont("Arial", 14, QFont.Bold))
+        title_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title_label)
+        
+        # Ordenação das disciplinas
+        sort_layout = QHBoxLayout()
+        sort_label = QLabel("Ordenar por:")
+        self.dashboard_sort = QComboBox()
+        self.dashboard_sort.addItems(ORDENACOES_PAINEL)
+        self.dashboard_sort.currentTextChanged.connect(self.update_dashboard)
+        sort_layout.addWidget(sort_label)
+        sort_layout.addWidget(self.dashboard_sort)
+        sort_layout.addStretch()
+        layout.addLayout(sort_layout)
+        
+        # Cabeçalho alinhado às colunas desenhadas pelo painel
+        header_layout = QHBoxLayout()
+        header_layout.setSpacing(0)
+        for titulo, largura in PainelEstatisticas.COLUNAS:
+            header_label = QLabel(titulo)
+            header_label.setFixedWidth(largura)
+            header_label.setStyleSheet("font-weight: bold; padding-left: 1px;")
+            header_layout.addWidget(header_label)
+        header_layout.addStretch()
+        layout.addLayout(header_layout)
+        
+        # O painel é desenhado diretamente, sem um widget por célula
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        self.dashboard_panel = PainelEstatisticas()
+        scroll_area.setWidget(self.dashboard_panel)
+        layout.addWidget(scroll_area)
+        
+        self.dashboard_info = QLabel("Carregue os dados para ver os indicadores de cada disciplina.")
+        self.dashboard_info.setWordWrap(True)
+        self.dashboard_info.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.dashboard_info)
+        
+        self.dashboard_tab.setLayout(layout)
+
     def load_excel_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self,
@@ -307,6 +883,28 @@ class MonitoriaApp(QMainWindow):
         if file_path:
             self.output_path_entry.setText(file_path)
 
+    def apply_formula(self):
+        try:
+            formula = FormulaClassificatoria(self.formula_entry.text())
+            # Recalcular as médias de todas as candidaturas já carregadas
+            if self.todas_candidaturas is not None:
+                self.todas_candidaturas['MEDIA_CLASSIFICATORIA'] = formula.avaliar(
+                    self.todas_candidaturas, self.notas_df)
+                self.ranking_completo = None
+        except ValueError as e:
+            QMessageBox.critical(self, "Erro", f"Erro na fórmula: {str(e)}")
+            return
+
+        self.formula = formula
+        self.settings.setValue("formula", formula.expressao)
+        self.status_bar.showMessage(f"Fórmula aplicada: {formula.expressao}")
+
+        current_disc = self.disc_selector.currentText()
+        if current_disc:
+            self.show_discipline_ranking(current_disc)
+        if self.resultado_df is not None:
+            self.process_info.setText("A fórmula mudou desde o último processamento.")
+
     def load_data(self):
         try:
             self.status_bar.showMessage("Carregando dados...")
@@ -336,8 +934,22 @@ class MonitoriaApp(QMainWindow):
             
             # Pré-calcular todas as candidaturas para a aba de classificação
             self.todas_candidaturas = self.criar_candidaturas()
+            self.ranking_completo = None
+            self.estatisticas = self.calcular_estatisticas()
+            self.verificar_correspondencias()
+            self.student_completer.model().setStringList(
+                [str(nome) for nome in self.inscricoes_df['ESTUDANTE'].drop_duplicates()])
+            
+            # Guardar o arquivo e o hash de cada planilha para a recarga automática
+            self.arquivo_carregado = excel_path
+            planilhas = {'notas': self.notas_df, 'inscricoes': self.inscricoes_df, 'vagas': self.vagas_df}
+            self.hashes_linhas = {nome: self.calcular_hashes_linhas(df) for nome, df in planilhas.items()}
+            self.hashes_planilhas = {nome: self.calcular_hash_planilha(df, self.hashes_linhas[nome])
+                                     for nome, df in planilhas.items()}
+            self.toggle_auto_reload(self.auto_reload_check.isChecked())
             
             # Exibir os dados iniciais (notas)
+            self.update_dashboard()
             self.data_selector.setCurrentText("Notas")
             self.change_dataset_view("Notas")
             
@@ -349,6 +961,11 @@ class MonitoriaApp(QMainWindow):
             QMessageBox.information(self, "Sucesso", "Dados carregados com sucesso!")
             self.status_bar.showMessage("Dados carregados. Pronto para processar.")
             
+            # Avisar sobre nomes que não bateram exatamente entre inscrições e notas
+            mensagem = self.resumo_correspondencias()
+            if mensagem:
+                QMessageBox.warning(self, "Atenção", mensagem + "\nConsulte \"Correspondência de Nomes\" na aba Visualizar Dados.")
+            
             # Atualizar a mensagem na aba de classificação
             self.ranking_info.setText("Dados carregados. Selecione uma disciplina para ver a classificação.")
             
@@ -361,6 +978,175 @@ class MonitoriaApp(QMainWindow):
             QMessageBox.critical(self, "Erro", f"Erro ao carregar os dados: {str(e)}")
             self.status_bar.showMessage(f"Erro: {str(e)}")
 
+    def toggle_auto_reload(self, ativo):
+        # Parar de observar qualquer arquivo anterior
+        arquivos = self.file_watcher.files()
+        if arquivos:
+            self.file_watcher.removePaths(arquivos)
+
+        # Só observa depois que os dados foram carregados ao menos uma vez
+        excel_path = self.arquivo_carregado
+        if ativo and self.hashes_planilhas and os.path.exists(excel_path):
+            self.file_watcher.addPath(excel_path)
+            self.status_bar.showMessage(f"Recarga automática ativa para {excel_path}")
+
+    def on_excel_file_changed(self, path):
+        # O Excel salva gravando um arquivo temporário e renomeando, o que remove
+        # o caminho do observador; por isso ele é adicionado novamente
+        if os.path.exists(path) and path not in self.file_watcher.files():
+            self.file_watcher.addPath(path)
+        self.reload_timer.start()
+
+    def calcular_hashes_linhas(self, df):
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def calcular_hash_planilha(self, df, hashes_linhas):
+        digest = hashlib.sha1(repr(list(df.columns)).encode('utf-8'))
+        digest.update(hashes_linhas.tobytes())
+        return digest.hexdigest()
+
+    def atualizar_candidaturas(self, notas_df, inscricoes_df, hashes_linhas):
+        # Recria apenas as candidaturas das inscrições alteradas ou cuja linha de notas mudou
+        # Cada linha de inscrição é identificada pelo hash do conteúdo e pela ocorrência
+        # (para linhas repetidas); -1 para linhas novas ou alteradas. Os hashes das linhas
+        # não incluem os nomes das colunas: se as colunas mudaram, tudo é refeito
+        def chaves(hashes):
+            ocorrencia = pd.Series(hashes).groupby(hashes, sort=False).cumcount().to_numpy()
+            return pd.MultiIndex.from_arrays([hashes, ocorrencia])
+        if list(inscricoes_df.columns) == list(self.inscricoes_df.columns):
+            anterior = chaves(self.hashes_linhas['inscricoes']).get_indexer(chaves(hashes_linhas['inscricoes']))
+        else:
+            anterior = np.full(len(inscricoes_df), -1, dtype=np.int64)
+        if list(notas_df.columns) != list(self.notas_df.columns):
+            anterior[:] = -1
+        
+        # Conteúdo da linha de notas de cada inscrição, antes e depois; o 0 no final
+        # representa "sem correspondência" (linha -1). As linhas antigas vêm das próprias
+        # candidaturas; inscrições sem candidaturas ficam com -1 e são simplesmente refeitas
+        linhas_antigas = np.full(len(self.inscricoes_df), -1, dtype=np.int64)
+        linhas_antigas[self.todas_candidaturas['LINHA_INSCRICAO'].to_numpy()] = \
+            self.todas_candidaturas['LINHA_NOTAS'].to_numpy()
+        linhas_novas = self.localizar_linhas_notas(inscricoes_df['ESTUDANTE'], inscricoes_df['MATRICULA'], notas_df)
+        hash_antigo = np.append(self.hashes_linhas['notas'], 0)
+        hash_novo = np.append(hashes_linhas['notas'], 0)
+        mantida = anterior >= 0
+        mantida[mantida] = hash_antigo[linhas_antigas[anterior[mantida]]] == hash_novo[linhas_novas[mantida]]
+        
+        # Candidaturas mantidas passam a apontar para as novas posições das inscrições e das notas
+        nova_posicao = np.full(len(self.inscricoes_df), -1, dtype=np.int64)
+        nova_posicao[anterior[mantida]] = np.flatnonzero(mantida)
+        posicao = nova_posicao[self.todas_candidaturas['LINHA_INSCRICAO'].to_numpy()]
+        mantidas = self.todas_candidaturas[posicao >= 0].copy()
+        mantidas['LINHA_INSCRICAO'] = posicao[posicao >= 0]
+        mantidas['LINHA_NOTAS'] = linhas_novas[mantidas['LINHA_INSCRICAO'].to_numpy()]
+        
+        refazer = np.flatnonzero(~mantida)
+        candidaturas = mantidas
+        if len(refazer):
+            novas = self.criar_candidaturas(inscricoes_df.iloc[refazer], notas_df)
+            novas['LINHA_INSCRICAO'] = refazer[novas['LINHA_INSCRICAO'].to_numpy()]
+            candidaturas = pd.concat([mantidas, novas], ignore_index=True)
+        
+        # Manter a ordem da planilha de inscrições, como em uma carga completa
+        ordem = np.lexsort((candidaturas['NUM_OPCAO'].to_numpy(), candidaturas['LINHA_INSCRICAO'].to_numpy()))
+        return candidaturas.iloc[ordem].reset_index(drop=True)
+
+    def recarregar_dados_alterados(self):
+        excel_path = self.arquivo_carregado
+        if not self.hashes_planilhas:
+            return
+        # Durante o processamento a recarga fica adiada: a thread usa as planilhas atuais
+        if self.process_thread is not None and self.process_thread.isRunning():
+            self.reload_timer.start()
+            return
+        if not os.path.exists(excel_path):
+            # O Excel ainda não renomeou o arquivo temporário: tentar de novo em seguida
+            if self.auto_reload_check.isChecked():
+                self.reload_timer.start()
+            return
+        # Se o arquivo sumiu durante o salvamento, o observador perdeu o caminho
+        if self.auto_reload_check.isChecked() and excel_path not in self.file_watcher.files():
+            self.file_watcher.addPath(excel_path)
+
+        # Erros aqui não abrem diálogos: o arquivo pode estar no meio de um salvamento.
+        # Tudo é montado em variáveis locais e só substitui o estado atual no final,
+        # para que uma falha não deixe planilhas e candidaturas de versões diferentes
+        try:
+            planilhas = pd.read_excel(excel_path, sheet_name=['notas', 'inscricoes', 'vagas'])
+            hashes_linhas = {nome: self.calcular_hashes_linhas(df) for nome, df in planilhas.items()}
+            novos_hashes = {nome: self.calcular_hash_planilha(df, hashes_linhas[nome]) for nome, df in planilhas.items()}
+            alteradas = [nome for nome in novos_hashes if novos_hashes[nome] != self.hashes_planilhas.get(nome)]
+
+            if not alteradas:
+                self.status_bar.showMessage("Arquivo salvo sem alterações nos dados.")
+                return
+
+            estudantes_alterados = 'notas' in alteradas or 'inscricoes' in alteradas
+            candidaturas = self.todas_candidaturas
+            if estudantes_alterados:
+                candidaturas = self.atualizar_candidaturas(planilhas['notas'], planilhas['inscricoes'], hashes_linhas)
+
+            self.notas_df = planilhas['notas']
+            self.inscricoes_df = planilhas['inscricoes']
+            self.vagas_df = planilhas['vagas']
+            self.todas_candidaturas = candidaturas
+            self.hashes_planilhas = novos_hashes
+            self.hashes_linhas = hashes_linhas
+
+            if estudantes_alterados:
+                self.ranking_completo = None
+                self.verificar_correspondencias()
+            if 'inscricoes' in alteradas:
+                self.student_completer.model().setStringList(
+                    [str(nome) for nome in self.inscricoes_df['ESTUDANTE'].drop_duplicates()])
+        except Exception as e:
+            self.status_bar.showMessage(f"Recarga automática falhou: {str(e)}")
+            return
+
+        if 'vagas' in alteradas:
+            # Atualizar a lista de disciplinas mantendo a seleção atual
+            disciplina_atual = self.disc_selector.currentText()
+            self.disciplinas = sorted(self.vagas_df['DISCIPLINA'].unique())
+            self.disc_selector.blockSignals(True)
+            self.disc_selector.clear()
+            self.disc_selector.addItems(self.disciplinas)
+            if disciplina_atual in self.disciplinas:
+                self.disc_selector.setCurrentText(disciplina_atual)
+            self.disc_selector.blockSignals(False)
+
+        # Atualizar as visualizações abertas
+        self.estatisticas = self.calcular_estatisticas()
+        self.update_dashboard()
+        self.change_dataset_view(self.data_selector.currentText())
+        self.show_discipline_ranking(self.disc_selector.currentText())
+
+        mensagem = f"Dados recarregados automaticamente. Planilhas alteradas: {', '.join(alteradas)}."
+        if self.resumo_correspondencias():
+            mensagem += " " + self.resumo_correspondencias().replace("\n", " ")
+        if self.resultado_df is not None:
+            mensagem += " Processe novamente para atualizar o resultado."
+            self.process_info.setText("Os dados mudaram desde o último processamento.")
+        self.status_bar.showMessage(mensagem)
+
+    def resumo_correspondencias(self):
+        if self.correspondencias_df is None or self.correspondencias_df.empty:
+            return ""
+        df = self.correspondencias_df
+        fora = df['Usada na Classificação'] == 'Não'
+        sugeridos = int((fora & df['Nome nas Notas'].notna()).sum())
+        revisar = int(((df['Revisar'] == 'Sim') & ~fora).sum())
+        
+        partes = []
+        if fora.any():
+            partes.append(f"{int(fora.sum())} estudante(s) inscrito(s) sem correspondência confirmada na planilha "
+                          "de notas (ficaram fora da classificação).")
+        if sugeridos:
+            partes.append(f"{sugeridos} deles têm um nome parecido sugerido: corrija o nome ou a matrícula "
+                          "na planilha de inscrições para confirmar.")
+        if revisar:
+            partes.append(f"{revisar} correspondência(s) de nomes para revisar.")
+        return "\n".join(partes)
+
     def create_table(self, df):
         # Limpar a tabela anterior
         self.table.setRowCount(0)
@@ -506,6 +1292,12 @@ class MonitoriaApp(QMainWindow):
             self.create_table(self.inscricoes_df)
         elif selection == "Vagas":
             self.create_table(self.vagas_df)
+        elif selection == "Chamadas":
+            self.create_table(self.tabela_chamadas() if self.estado_alocacao is not None else None)
+        elif selection == "Correspondência de Nomes":
+            self.create_table(self.correspondencias_df)
+        elif selection == "Comparação de Modos":
+            self.create_table(self.comparacao_df)
         elif selection == "Resultado":
             # Aqui aplicamos cores de fundo diferentes por disciplina
             if self.resultado_df is not None:
@@ -524,16 +1316,11 @@ class MonitoriaApp(QMainWindow):
             self.highlight_legend.setStyleSheet("color: #FF8C00; font-style: italic;")
             self.ranking_layout.addWidget(self.highlight_legend)
         
-        # Filtrar candidatos para a disciplina selecionada
-        candidatos_disciplina = [c for c in self.todas_candidaturas if c['DISCIPLINA'] == disciplina]
-        
-        # Ordenar por média classificatória (do maior para o menor)
-        candidatos_ordenados = sorted(candidatos_disciplina, 
-                                    key=lambda x: x['MEDIA_CLASSIFICATORIA'], 
-                                    reverse=True)
-        
-        # Criar dataframe para exibição
-        df = pd.DataFrame(candidatos_ordenados)
+        # Recortar a disciplina selecionada da classificação completa (calculada uma única vez)
+        if self.ranking_completo is None:
+            self.calcular_todas_classificacoes()
+        inicio, fim = self.ranking_limites.get(disciplina, (0, 0))
+        df = self.ranking_completo.iloc[inicio:fim].drop(columns=['Disciplina']).reset_index(drop=True)
         
         if df.empty:
             self.ranking_table.setRowCount(1)
@@ -544,26 +1331,6 @@ class MonitoriaApp(QMainWindow):
             self.highlight_legend.setVisible(False)
             return
         
-        # Renomear colunas para melhor visualização
-        df = df.rename(columns={
-            'NOME': 'Nome',
-            'MATRICULA': 'Matrícula',
-            'MEDIA_CLASSIFICATORIA': 'Média Classificatória',
-            'OPCAO': 'Opção',
-            'NOTA_DISCIPLINA': 'Nota na Disciplina',
-            'MEDIA_GLOBAL': 'Média Global'
-        })
-        
-        # Formatar média classificatória para 4 casas decimais
-        df['Média Classificatória'] = df['Média Classificatória'].apply(lambda x: round(x, 4))
-        
-        # Substituir OPCAO por um texto mais amigável
-        df['Opção'] = df['Opção'].replace({
-            'PRIMEIRA OPCAO': '1ª OPÇÃO',
-            'SEGUNDA OPCAO': '2ª OPÇÃO',
-            'TERCEIRA OPCAO': '3ª OPÇÃO'
-        })
-        
         # Obter número de vagas para a disciplina
         try:
             num_vagas = self.vagas_df[self.vagas_df['DISCIPLINA'] == disciplina]['VAGAS'].iloc[0]
@@ -579,29 +1346,13 @@ class MonitoriaApp(QMainWindow):
         self.ranking_table.setColumnCount(len(cols))
         self.ranking_table.setHorizontalHeaderLabels(cols)
         
-        # Verificar se já temos o resultado processado para destacar estudantes classificados em outras disciplinas
-        estudantes_classificados_por_disciplina = {}
-        tem_destaques = False
-        
-        if self.resultado_df is not None:
-            for _, row in self.resultado_df.iterrows():
-                disc = row['Disciplina']
-                nome = row['Nome']
-                if disc not in estudantes_classificados_por_disciplina:
-                    estudantes_classificados_por_disciplina[disc] = []
-                estudantes_classificados_por_disciplina[disc].append(nome)
+        # Destacar estudantes já classificados em outras disciplinas (se houver resultado processado)
+        em_outra_disciplina = (df['Situação'] == SITUACAO_OUTRA_DISCIPLINA).to_numpy()
+        tem_destaques = bool(em_outra_disciplina.any())
         
         # Preencher a tabela
         for i in range(len(df)):
-            nome_estudante = df.iloc[i]['Nome']
-            
-            # Verificar se o estudante está classificado em outra disciplina que não a atual
-            classificado_em_outra_disciplina = False
-            for disc, estudantes in estudantes_classificados_por_disciplina.items():
-                if disc != disciplina and nome_estudante in estudantes:
-                    classificado_em_outra_disciplina = True
-                    tem_destaques = True
-                    break
+            classificado_em_outra_disciplina = em_outra_disciplina[i]
             
             # Coloca os dados do DataFrame
             for j, col in enumerate(df.columns):
@@ -628,6 +1379,298 @@ class MonitoriaApp(QMainWindow):
         self.ranking_info.setText("A tabela mostra todos os candidatos inscritos para esta disciplina, " +
                                 "ordenados por média classificatória (independentemente da prioridade de opção).")
 
+    def calcular_todas_classificacoes(self):
+        # Classificação de todas as disciplinas em uma única ordenação agrupada
+        candidaturas = self.todas_candidaturas
+        cod_disciplina, disciplinas = pd.factorize(candidaturas['DISCIPLINA'], sort=True)
+        medias = candidaturas['MEDIA_CLASSIFICATORIA'].to_numpy(dtype=float)
+        
+        # Disciplina, maior média primeiro, empates na ordem das candidaturas
+        ordem = np.lexsort((np.arange(len(candidaturas)), -medias, cod_disciplina))
+        cod_ordenado = cod_disciplina[ordem]
+        limites = np.searchsorted(cod_ordenado, np.arange(len(disciplinas) + 1))
+        ranking = candidaturas.iloc[ordem]
+        
+        if self.resultado_df is not None:
+            # Comparar pares (disciplina, estudante) como inteiros em vez de strings; o estudante
+            # é a linha da planilha de notas, como na alocação
+            num_linhas = len(self.notas_df)
+            cod_aluno = ranking['LINHA_NOTAS'].to_numpy()
+            chaves = cod_ordenado.astype(np.int64) * num_linhas + cod_aluno
+            res_disciplina = pd.Index(disciplinas).get_indexer(self.resultado_df['Disciplina'])
+            res_aluno = self.localizar_linhas_notas(self.resultado_df['Nome'], self.resultado_df['Matrícula'])
+            validos = (res_disciplina >= 0) & (res_aluno >= 0)
+            chaves_classificadas = res_disciplina[validos].astype(np.int64) * num_linhas + res_aluno[validos]
+            
+            codigos = np.where(np.isin(chaves, chaves_classificadas), 0,
+                               np.where(np.isin(cod_aluno, res_aluno[validos]), 1, 2))
+            situacao = np.array([SITUACAO_NESTA_DISCIPLINA, SITUACAO_OUTRA_DISCIPLINA, 'Não classificado'],
+                                dtype=object)[codigos]
+        else:
+            situacao = np.full(len(ranking), '', dtype=object)
+        
+        self.ranking_completo = pd.DataFrame({
+            'Disciplina': ranking['DISCIPLINA'].to_numpy(),
+            'Posição': np.arange(len(ordem)) - limites[cod_ordenado] + 1,
+            'Nome': ranking['NOME'].to_numpy(),
+            'Matrícula': ranking['MATRICULA'].to_numpy(),
+            'Média Classificatória': ranking['MEDIA_CLASSIFICATORIA'].round(4).to_numpy(),
+            'Opção': ranking['OPCAO'].map({
+                'PRIMEIRA OPCAO': '1ª OPÇÃO',
+                'SEGUNDA OPCAO': '2ª OPÇÃO',
+                'TERCEIRA OPCAO': '3ª OPÇÃO'
+            }).to_numpy(),
+            'Nota na Disciplina': ranking['NOTA_DISCIPLINA'].to_numpy(),
+            'Média Global': ranking['MEDIA_GLOBAL'].to_numpy(),
+            'Situação': situacao
+        })
+        self.ranking_limites = {disc: (limites[i], limites[i + 1]) for i, disc in enumerate(disciplinas)}
+        return self.ranking_completo
+
+    def calcular_estatisticas(self):
+        # Indicadores de todas as disciplinas em uma única passagem agrupada
+        disciplinas = list(self.disciplinas)
+        num_disciplinas = len(disciplinas)
+        indice_disciplinas = pd.Index(disciplinas)
+        # Como em indexar_candidaturas, vale a última linha de cada disciplina na planilha de vagas
+        vagas = (self.vagas_df.drop_duplicates('DISCIPLINA', keep='last').set_index('DISCIPLINA')['VAGAS']
+                 .reindex(disciplinas).fillna(0).to_numpy(dtype=np.int64))
+        
+        # Candidatos por opção e histograma das notas: bincount sobre códigos combinados
+        candidaturas = self.todas_candidaturas
+        cod_disciplina = indice_disciplinas.get_indexer(candidaturas['DISCIPLINA'])
+        validas = cod_disciplina >= 0
+        cod_disciplina = cod_disciplina[validas]
+        num_opcao = candidaturas['NUM_OPCAO'].to_numpy()[validas]
+        candidatos_opcao = np.bincount(cod_disciplina * len(OPCOES) + num_opcao - 1,
+                                       minlength=num_disciplinas * len(OPCOES)).reshape(num_disciplinas, len(OPCOES))
+        
+        notas = pd.to_numeric(candidaturas['NOTA_DISCIPLINA'], errors='coerce').to_numpy(dtype=float)[validas]
+        com_nota = ~np.isnan(notas)
+        # Faixas comuns a todas as disciplinas, para que os histogramas sejam comparáveis
+        minimo, maximo = (notas[com_nota].min(), notas[com_nota].max()) if com_nota.any() else (0.0, 10.0)
+        if maximo <= minimo:
+            maximo = minimo + 1
+        faixa = ((notas[com_nota] - minimo) / (maximo - minimo) * FAIXAS_DISTRIBUICAO_NOTAS).astype(np.int64)
+        faixa = np.minimum(faixa, FAIXAS_DISTRIBUICAO_NOTAS - 1)
+        distribuicao_notas = np.bincount(cod_disciplina[com_nota] * FAIXAS_DISTRIBUICAO_NOTAS + faixa,
+                                         minlength=num_disciplinas * FAIXAS_DISTRIBUICAO_NOTAS)
+        distribuicao_notas = distribuicao_notas.reshape(num_disciplinas, FAIXAS_DISTRIBUICAO_NOTAS)
+        
+        # Classificados e nota de corte (menor média entre os classificados) a partir do resultado
+        classificados = np.zeros(num_disciplinas, dtype=np.int64)
+        nota_corte = np.full(num_disciplinas, np.nan)
+        if self.resultado_df is not None:
+            res_disciplina = indice_disciplinas.get_indexer(self.resultado_df['Disciplina'])
+            validos = res_disciplina >= 0
+            classificados = np.bincount(res_disciplina[validos], minlength=num_disciplinas)
+            np.fmin.at(nota_corte, res_disciplina[validos],
+                       self.resultado_df['Média Classificatória'].to_numpy(dtype=float)[validos])
+        preenchimento = np.divide(classificados, vagas, out=np.full(num_disciplinas, np.nan), where=vagas > 0)
+        
+        return {
+            'disciplinas': disciplinas,
+            'vagas': vagas,
+            'classificados': classificados,
+            'preenchimento': preenchimento,
+            'nota_corte': nota_corte,
+            'candidatos_opcao': candidatos_opcao,
+            'maximo_candidatos': int(candidatos_opcao.sum(axis=1).max()) if num_disciplinas else 0,
+            'distribuicao_notas': distribuicao_notas,
+            'faixas_notas': np.linspace(minimo, maximo, FAIXAS_DISTRIBUICAO_NOTAS + 1),
+            'processado': self.resultado_df is not None
+        }
+
+    def export_all_rankings(self):
+        if self.todas_candidaturas is None:
+            QMessageBox.critical(self, "Erro", "Por favor, carregue os dados primeiro.")
+            return
+        
+        output_dir = os.path.dirname(self.output_path_entry.text()) or os.path.expanduser("~")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Selecione onde salvar as classificações",
+            os.path.join(output_dir, "classificacoes_monitoria.xlsx"),
+            "Excel files (*.xlsx);;All files (*.*)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            if self.ranking_completo is None:
+                self.calcular_todas_classificacoes()
+            self.ranking_completo.to_excel(file_path, sheet_name='Classificações', index=False)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao exportar as classificações: {str(e)}")
+            return
+        
+        self.status_bar.showMessage(f"Classificações exportadas para {file_path}")
+        QMessageBox.information(self, "Sucesso", f"Classificações de todas as disciplinas salvas em:\n{file_path}")
+
+    def processamento_atual(self):
+        return {'candidaturas': self.candidaturas_processadas, 'rastreamento': self.rastreamento,
+                'comparacao': self.comparacao_df, 'estado_alocacao': self.estado_alocacao}
+
+    def salvar_resultado(self, resultado_df, path, processamento=None):
+        # A thread de processamento passa o estado novo, que ainda não foi aplicado à janela
+        if processamento is None:
+            processamento = self.processamento_atual()
+        estado = processamento['estado_alocacao']
+        with pd.ExcelWriter(path) as writer:
+            resultado_df.to_excel(writer, sheet_name='Classificação', index=False)
+            # No modo de aceitação adiada, incluir a comparação com o modo padrão
+            if processamento['comparacao'] is not None:
+                processamento['comparacao'].to_excel(writer, sheet_name='Comparação de Modos', index=False)
+            # Depois da primeira chamada, incluir o histórico de chamadas e desistências
+            if estado is not None and estado['chamada'] > 1:
+                self.tabela_chamadas(estado).to_excel(writer, sheet_name='Chamadas', index=False)
+        # O rastreamento de todas as candidaturas vai em um CSV ao lado do resultado
+        self.tabela_rastreamento(processamento=processamento).to_csv(
+            caminho_rastreamento(path), index=False, encoding='utf-8-sig')
+
+    def register_withdrawal(self):
+        nome = self.student_entry.text().strip()
+        if not nome:
+            return
+        if self.estado_alocacao is None:
+            QMessageBox.critical(self, "Erro", "Processe a classificação antes de registrar desistências.")
+            return
+        
+        try:
+            liberou_vaga = self.registrar_desistencia(nome)
+        except ValueError as e:
+            QMessageBox.critical(self, "Erro", str(e))
+            return
+        
+        self.update_call_info()
+        self.show_student_trace()
+        if liberou_vaga:
+            self.status_bar.showMessage(f"Desistência de {nome} registrada. A vaga será preenchida na próxima chamada.")
+        else:
+            self.status_bar.showMessage(f"Desistência de {nome} registrada (o estudante não estava classificado).")
+
+    def next_call(self):
+        if self.estado_alocacao is None:
+            QMessageBox.critical(self, "Erro", "Processe a classificação antes de realizar uma nova chamada.")
+            return
+        
+        try:
+            resultado_df, promovidos = self.realizar_chamada()
+        except ValueError as e:
+            QMessageBox.warning(self, "Atenção", str(e))
+            return
+        self.resultado_df = resultado_df
+        self.ranking_completo = None
+        self.estatisticas = self.calcular_estatisticas()
+        
+        # Salvar o resultado atualizado no mesmo arquivo de saída
+        output_path = self.output_path_entry.text()
+        try:
+            self.salvar_resultado(resultado_df, output_path)
+            salvo = f"Arquivo atualizado: {output_path}"
+        except Exception as e:
+            salvo = f"Não foi possível atualizar o arquivo de saída: {str(e)}"
+        
+        self.change_dataset_view(self.data_selector.currentText())
+        current_disc = self.disc_selector.currentText()
+        if current_disc:
+            self.show_discipline_ranking(current_disc)
+        self.update_call_info()
+        self.update_dashboard()
+        self.show_student_trace()
+        
+        chamada = self.estado_alocacao['chamada']
+        self.status_bar.showMessage(f"{chamada}ª chamada concluída: {len(promovidos)} estudante(s) classificado(s).")
+        QMessageBox.information(self, "Sucesso",
+                                f"{chamada}ª chamada concluída: {len(promovidos)} estudante(s) classificado(s).\n{salvo}")
+
+    def update_call_info(self):
+        estado = self.estado_alocacao
+        if estado is None:
+            self.call_info.setText("")
+            return
+        vagas_liberadas = int(sum(estado['vagas_restantes'][d] for d in estado['pendentes']))
+        self.call_info.setText(
+            f"Chamada atual: {estado['chamada']}ª - Desistências registradas: {len(estado['desistencias'])} - "
+            f"Vagas liberadas para a próxima chamada: {vagas_liberadas}")
+
+    def update_dashboard(self):
+        est = self.estatisticas
+        if est is None:
+            self.dashboard_panel.definir_estatisticas(None, np.array([], dtype=np.int64))
+            return
+        
+        # Só a ordem das linhas é refeita aqui; os indicadores já estão calculados
+        criterio = self.dashboard_sort.currentText()
+        if criterio == 'Menor preenchimento':
+            ordem = np.argsort(est['preenchimento'], kind='stable')
+        elif criterio == 'Mais candidatos':
+            ordem = np.argsort(-est['candidatos_opcao'].sum(axis=1), kind='stable')
+        else:
+            ordem = np.arange(len(est['disciplinas']))
+        self.dashboard_panel.definir_estatisticas(est, ordem)
+        
+        total_vagas = int(est['vagas'].sum())
+        texto = (f"{len(est['disciplinas'])} disciplina(s) - {total_vagas} vaga(s) - "
+                 f"{int(est['candidatos_opcao'].sum())} candidatura(s)")
+        if est['processado']:
+            classificados = int(est['classificados'].sum())
+            texto += f" - {classificados} classificado(s)"
+            if total_vagas:
+                texto += f" ({classificados / total_vagas:.0%} das vagas preenchidas)"
+        else:
+            texto += " - processe a classificação para ver o preenchimento e as notas de corte"
+        texto += (f"\nDistribuição das notas na disciplina em {FAIXAS_DISTRIBUICAO_NOTAS} faixas "
+                  f"de {est['faixas_notas'][0]:g} a {est['faixas_notas'][-1]:g}.")
+        self.dashboard_info.setText(texto)
+
+    def show_student_trace(self):
+        nome = self.student_entry.text().strip()
+        if not nome:
+            return
+        if self.rastreamento is None:
+            self.student_info.setText("Processe a classificação primeiro para consultar o rastreamento.")
+            return
+        
+        df = self.consultar_rastreamento(nome)
+        if df.empty:
+            self.student_table.setRowCount(0)
+            self.student_table.setColumnCount(0)
+            self.student_info.setText(f"Nenhuma candidatura encontrada para \"{nome}\" no último processamento.")
+            return
+        
+        self.student_table.setRowCount(len(df))
+        self.student_table.setColumnCount(len(df.columns))
+        self.student_table.setHorizontalHeaderLabels(df.columns)
+        
+        for i in range(len(df)):
+            classificado = df.iloc[i]['Situação'] == SITUACOES_RASTREAMENTO[0]
+            for j in range(len(df.columns)):
+                value = df.iloc[i, j]
+                if pd.isna(value):
+                    item = QTableWidgetItem("")
+                else:
+                    item = QTableWidgetItem(str(value))
+                
+                # Destacar a candidatura em que o estudante foi classificado
+                if classificado:
+                    item.setBackground(QBrush(QColor(200, 230, 201)))  # Verde claro
+                    item.setForeground(QBrush(QColor(0, 0, 0)))
+                
+                self.student_table.setItem(i, j, item)
+        
+        self.student_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        if self.estado_alocacao['modo'] == MODO_ACEITACAO_ADIADA:
+            self.student_info.setText(
+                "Aceitação adiada (sem fases). Posição na Fase: posição no ranking completo da disciplina. "
+                "Vagas na Fase: vagas da disciplina. Nota de Corte: menor média entre os classificados "
+                "no resultado final da disciplina.")
+        else:
+            self.student_info.setText(
+                "Fase: última fase em que a candidatura foi considerada. Posição na Fase: posição entre os "
+                "candidatos ainda não classificados naquele momento. Nota de Corte: menor média dentro das vagas "
+                "restantes naquela fase.")
+
     def process_data(self):
         # Verificar se os dados foram carregados
         if self.notas_df is None or self.inscricoes_df is None or self.vagas_df is None:
@@ -677,19 +1720,46 @@ class MonitoriaApp(QMainWindow):
         # Desabilitar o botão durante o processamento e mudar para cor cinza
         self.process_btn.setEnabled(False)
         self.process_btn.setStyleSheet("background-color: #cccccc; color: #666666;")
+        # Nada pode alterar planilhas ou chamadas enquanto a thread processa
+        self.definir_acoes_habilitadas(False)
         
-        self.process_thread = ProcessThread(self, output_path)
+        self.process_thread = ProcessThread(self, output_path, self.mode_selector.currentText())
         self.process_thread.finished.connect(self.on_process_finished)
         self.process_thread.error.connect(self.on_process_error)
         self.process_thread.start()
 
-    def on_process_finished(self, resultado_df, output_path):
+    def definir_acoes_habilitadas(self, habilitadas):
+        self.load_btn.setEnabled(habilitadas)
+        self.withdraw_btn.setEnabled(habilitadas)
+        self.call_btn.setEnabled(habilitadas)
+
+    def on_process_finished(self, resultado_df, output_path, processamento):
+        self.candidaturas_processadas = processamento['candidaturas']
+        self.rastreamento = processamento['rastreamento']
+        self.rastreamento_indice = None
+        self.comparacao_df = processamento['comparacao']
+        self.estado_alocacao = processamento['estado_alocacao']
         self.resultado_df = resultado_df
+        self.ranking_completo = None
+        self.estatisticas = self.calcular_estatisticas()
+        self.update_call_info()
+        self.update_dashboard()
         self.data_selector.setCurrentText("Resultado")
         self.change_dataset_view("Resultado")
         
         self.status_bar.showMessage("Processamento concluído com sucesso.")
-        self.process_info.setText(f"Processamento concluído!\nArquivo salvo em: {output_path}")
+        self.process_info.setText(f"Processamento concluído!\nArquivo salvo em: {output_path}\n"
+                                  f"Rastreamento salvo em: {caminho_rastreamento(output_path)}")
+        
+        # Resumo da comparação entre os modos de alocação
+        if self.comparacao_df is not None:
+            alterados = int((self.comparacao_df['Alterado'] == 'Sim').sum())
+            self.process_info.setText(
+                self.process_info.text() +
+                f"\nComparação com o modo padrão: "
+                f"{self.comparacao_df['Três Fases: Disciplina'].notna().sum()} classificados em três fases, "
+                f"{self.comparacao_df['Aceitação Adiada: Disciplina'].notna().sum()} na aceitação adiada, "
+                f"{alterados} estudante(s) com alocação diferente (veja \"Comparação de Modos\").")
         
         # Atualizar a classificação por disciplina também
         current_disc = self.disc_selector.currentText()
@@ -702,6 +1772,7 @@ class MonitoriaApp(QMainWindow):
         # Reativar o botão de processamento e voltar à cor verde
         self.process_btn.setEnabled(True)
         self.process_btn.setStyleSheet("background-color: #4CAF50; color: white;")
+        self.definir_acoes_habilitadas(True)
         
         QMessageBox.information(self, "Sucesso", f"Processamento concluído com sucesso!\nArquivo salvo em: {output_path}")
 
@@ -712,121 +1783,651 @@ class MonitoriaApp(QMainWindow):
         # Reativar o botão de processamento e voltar à cor verde
         self.process_btn.setEnabled(True)
         self.process_btn.setStyleSheet("background-color: #4CAF50; color: white;")
+        self.definir_acoes_habilitadas(True)
         
         QMessageBox.critical(self, "Erro", f"Erro durante o processamento: {error_msg}")
 
-    def calcular_media_classificatoria(self, nota_disciplina, media_global):
-        return (2 * nota_disciplina + media_global) / 3
+    def calcular_media_classificatoria(self, candidaturas, notas_df=None):
+        return self.formula.avaliar(candidaturas, self.notas_df if notas_df is None else notas_df)
 
-    def criar_candidaturas(self):
-        todas_candidaturas = []
-        for _, inscricao in self.inscricoes_df.iterrows():
-            aluno_nome = inscricao['ESTUDANTE']
-            notas_aluno = self.notas_df[self.notas_df['ESTUDANTE'] == aluno_nome].iloc[0]
+    def localizar_linhas_notas(self, nomes, matriculas, notas_df=None):
+        if notas_df is None:
+            notas_df = self.notas_df
+        # O índice de nomes é refeito apenas quando a planilha de notas muda. A referência
+        # local não muda no meio da consulta, e só a thread da interface guarda o índice novo
+        correspondencia = self.correspondencia
+        if correspondencia is None or correspondencia.notas_df is not notas_df:
+            correspondencia = CorrespondenciaEstudantes(notas_df)
+            if QThread.currentThread() is self.thread():
+                self.correspondencia = correspondencia
+        return correspondencia.localizar(nomes, matriculas)
 
-            for opcao in ['PRIMEIRA OPCAO', 'SEGUNDA OPCAO', 'TERCEIRA OPCAO']:
-                if pd.isna(inscricao[opcao]):
+    def verificar_correspondencias(self):
+        self.localizar_linhas_notas(self.inscricoes_df['ESTUDANTE'], self.inscricoes_df['MATRICULA'])
+        self.correspondencias_df = self.correspondencia.relatorio(
+            self.inscricoes_df['ESTUDANTE'].tolist(), self.inscricoes_df['MATRICULA'].tolist())
+        return self.correspondencias_df
+
+    def criar_candidaturas(self, inscricoes_df=None, notas_df=None):
+        if inscricoes_df is None:
+            inscricoes_df = self.inscricoes_df
+        if notas_df is None:
+            notas_df = self.notas_df
+        
+        # Uma linha por (inscrição, opção preenchida), na ordem da planilha de inscrições
+        partes = []
+        for num_opcao, opcao in enumerate(OPCOES, 1):
+            preenchidas = inscricoes_df[opcao].notna().to_numpy()
+            partes.append(pd.DataFrame({
+                'LINHA_INSCRICAO': np.flatnonzero(preenchidas),
+                'NUM_OPCAO': num_opcao,
+                'DISCIPLINA': inscricoes_df[opcao].to_numpy()[preenchidas]
+            }))
+        longo = pd.concat(partes, ignore_index=True)
+        longo = longo.iloc[np.lexsort((longo['NUM_OPCAO'].to_numpy(), longo['LINHA_INSCRICAO'].to_numpy()))]
+        
+        # Inscrições sem correspondência na planilha de notas ficam de fora (ver verificar_correspondencias)
+        linhas_notas_inscricao = self.localizar_linhas_notas(inscricoes_df['ESTUDANTE'], inscricoes_df['MATRICULA'],
+                                                            notas_df)
+        longo = longo[linhas_notas_inscricao[longo['LINHA_INSCRICAO'].to_numpy()] >= 0]
+        
+        linhas_inscricao = longo['LINHA_INSCRICAO'].to_numpy()
+        nomes = inscricoes_df['ESTUDANTE'].to_numpy()[linhas_inscricao]
+        linhas_notas = linhas_notas_inscricao[linhas_inscricao]
+        
+        # Nota de cada candidato na disciplina escolhida, buscada em bloco por coluna
+        disciplinas = longo['DISCIPLINA'].to_numpy()
+        colunas_notas = pd.Index(notas_df.columns)
+        colunas = pd.unique(disciplinas)
+        ausentes = [str(d) for d in colunas if d not in colunas_notas]
+        if ausentes:
+            raise ValueError(f"Disciplina(s) sem coluna na planilha 'notas': {', '.join(ausentes)}")
+        codigos = pd.Index(colunas).get_indexer(disciplinas)
+        matriz_notas = notas_df[list(colunas)].to_numpy()
+        
+        candidaturas = pd.DataFrame({
+            'NOME': nomes,
+            'MATRICULA': inscricoes_df['MATRICULA'].to_numpy()[linhas_inscricao],
+            'DISCIPLINA': disciplinas,
+            'MEDIA_CLASSIFICATORIA': np.nan,
+            'OPCAO': np.asarray(OPCOES, dtype=object)[longo['NUM_OPCAO'].to_numpy() - 1],
+            'NOTA_DISCIPLINA': matriz_notas[linhas_notas, codigos],
+            'MEDIA_GLOBAL': notas_df['Média Global'].to_numpy()[linhas_notas],
+            # Colunas auxiliares usadas pela fórmula e pela recarga automática
+            'NUM_OPCAO': longo['NUM_OPCAO'].to_numpy(),
+            'LINHA_NOTAS': linhas_notas,
+            'LINHA_INSCRICAO': linhas_inscricao
+        })
+        candidaturas['MEDIA_CLASSIFICATORIA'] = self.calcular_media_classificatoria(candidaturas, notas_df)
+        return candidaturas
+
+    def indexar_candidaturas(self, candidaturas, vagas_df=None):
+        if vagas_df is None:
+            vagas_df = self.vagas_df
+        # Vagas por disciplina, na ordem da planilha de vagas
+        vagas = {row['DISCIPLINA']: row['VAGAS'] for _, row in vagas_df.iterrows()}
+        disciplinas = list(vagas.keys())
+        
+        cod_disciplina = pd.Index(disciplinas).get_indexer(candidaturas['DISCIPLINA'])
+        # O estudante é a linha da planilha de notas, não o nome digitado na inscrição:
+        # "ana souza" e "Ana Souza" são a mesma pessoa e só podem ocupar uma vaga
+        cod_aluno, alunos = pd.factorize(candidaturas['LINHA_NOTAS'])
+        medias = candidaturas['MEDIA_CLASSIFICATORIA'].to_numpy(dtype=float)
+        
+        # Ranking de todas as disciplinas em uma única ordenação: maior média primeiro,
+        # empates na ordem das candidaturas
+        ordem = np.lexsort((np.arange(len(candidaturas)), -medias, cod_disciplina))
+        limites = np.searchsorted(cod_disciplina[ordem], np.arange(len(disciplinas) + 1))
+        
+        return {
+            'disciplinas': disciplinas,
+            'vagas': np.array([int(v) for v in vagas.values()], dtype=np.int64),
+            'cod_disciplina': cod_disciplina,
+            'cod_aluno': cod_aluno,
+            'num_alunos': len(alunos),
+            'num_opcao': candidaturas['NUM_OPCAO'].to_numpy(),
+            'medias': medias,
+            'ordem': ordem,
+            'limites': limites
+        }
+
+    def processar_classificacoes(self, modo=MODO_TRES_FASES, notas_df=None, inscricoes_df=None, vagas_df=None):
+        # Roda na thread de processamento: devolve o novo estado em vez de alterar a janela
+        candidaturas = self.criar_candidaturas(inscricoes_df, notas_df)
+        indice = self.indexar_candidaturas(candidaturas, vagas_df)
+        
+        comparacao_df = None
+        filas = None
+        if modo == MODO_ACEITACAO_ADIADA:
+            aceitos, passo_rast, posicao_rast, passos, filas = self.alocar_aceitacao_adiada(indice)
+            # Processar também no modo padrão para comparar os dois resultados
+            aceitos_tres_fases = self.alocar_tres_fases(indice)[0]
+            comparacao_df = self.comparar_modos(candidaturas, aceitos_tres_fases, aceitos)
+        else:
+            aceitos, passo_rast, posicao_rast, passos = self.alocar_tres_fases(indice)
+        
+        processamento = {
+            'candidaturas': candidaturas,
+            'rastreamento': self.montar_rastreamento(indice, aceitos, passo_rast, posicao_rast, passos),
+            'comparacao': comparacao_df,
+            'estado_alocacao': self.iniciar_estado_alocacao(candidaturas, indice, aceitos, modo, filas)
+        }
+        return self.montar_resultado(candidaturas, indice, aceitos), processamento
+
+    def alocar_tres_fases(self, indice):
+        cod_aluno = indice['cod_aluno']
+        num_opcao = indice['num_opcao']
+        ordem = indice['ordem']
+        limites = indice['limites']
+        
+        vagas_restantes = indice['vagas'].copy()
+        aluno_classificado = np.zeros(indice['num_alunos'], dtype=bool)
+        aceitos_por_passo = []
+        
+        # Rastreamento: para cada candidatura, o último passo (fase, disciplina) em que
+        # ela foi considerada e sua posição no ranking naquele momento
+        passo_rast = np.zeros(len(cod_aluno), dtype=np.int64)
+        posicao_rast = np.zeros(len(cod_aluno), dtype=np.int64)
+        passos = [(0, 0, np.nan)]  # (fase, vagas no passo, nota de corte); o passo 0 = não considerada
+        
+        # FASE 1: apenas candidatos de 1ª opção dentro do número de vagas
+        # FASE 2: candidatos de 1ª e 2ª opção nas vagas remanescentes
+        # FASE 3: vagas restantes com qualquer opção
+        for fase in (1, 2, 3):
+            for d in range(len(indice['disciplinas'])):
+                if vagas_restantes[d] <= 0:
                     continue
+                
+                # Ranking da disciplina sem os já classificados
+                ranking = ordem[limites[d]:limites[d + 1]]
+                ranking = ranking[~aluno_classificado[cod_aluno[ranking]]]
+                topo = ranking[:vagas_restantes[d]]
+                aceitos = topo[num_opcao[topo] <= fase]
+                
+                passo_rast[ranking] = len(passos)
+                posicao_rast[ranking] = np.arange(1, len(ranking) + 1)
+                passos.append((fase, vagas_restantes[d], indice['medias'][topo[-1]] if len(topo) else np.nan))
+                
+                aluno_classificado[cod_aluno[aceitos]] = True
+                vagas_restantes[d] -= len(aceitos)
+                aceitos_por_passo.append(aceitos)
+        
+        aceitos = np.concatenate(aceitos_por_passo) if aceitos_por_passo else np.array([], dtype=np.int64)
+        return aceitos, passo_rast, posicao_rast, passos
 
-                disciplina = inscricao[opcao]
-                nota_disciplina = notas_aluno[disciplina]
-                media_global = notas_aluno['Média Global']
-                media_class = self.calcular_media_classificatoria(nota_disciplina, media_global)
-
-                todas_candidaturas.append({
-                    'NOME': aluno_nome,
-                    'MATRICULA': inscricao['MATRICULA'],
-                    'DISCIPLINA': disciplina,
-                    'MEDIA_CLASSIFICATORIA': media_class,
-                    'OPCAO': opcao,
-                    'NOTA_DISCIPLINA': nota_disciplina,
-                    'MEDIA_GLOBAL': media_global
-                })
-        return todas_candidaturas
-
-    def get_ranking_disciplina(self, candidaturas, disciplina, classificados):
-        # Pega todos os candidatos não classificados para a disciplina
-        candidatos_disciplina = [
-            c for c in candidaturas
-            if c['DISCIPLINA'] == disciplina and c['NOME'] not in classificados
+    def alocar_aceitacao_adiada(self, indice):
+        # Aceitação adiada: cada estudante propõe às opções em ordem de preferência e cada
+        # disciplina mantém em um heap os melhores candidatos até o número de vagas
+        cod_aluno = indice['cod_aluno']
+        cod_disciplina = indice['cod_disciplina']
+        num_candidaturas = len(cod_aluno)
+        
+        # Preferências de cada estudante: suas candidaturas em ordem de opção
+        preferencias = np.lexsort((np.arange(num_candidaturas), indice['num_opcao'], cod_aluno))
+        inicio = np.searchsorted(cod_aluno[preferencias], np.arange(indice['num_alunos'] + 1))
+        
+        # Prioridade da disciplina: maior média; empates na ordem das candidaturas
+        medias = np.where(np.isnan(indice['medias']), -np.inf, indice['medias']).tolist()
+        preferencias = preferencias.tolist()
+        proxima = inicio[:-1].tolist()
+        fim = inicio[1:].tolist()
+        alunos = cod_aluno.tolist()
+        disciplinas = cod_disciplina.tolist()
+        vagas = indice['vagas'].tolist()
+        propostas = np.zeros(num_candidaturas, dtype=bool)
+        heaps = [[] for _ in vagas]
+        rejeitadas = [[] for _ in vagas]  # Usadas depois pelas chamadas, com a melhor média no topo
+        
+        livres = list(range(indice['num_alunos']))
+        while livres:
+            aluno = livres.pop()
+            if proxima[aluno] >= fim[aluno]:
+                continue  # Sem mais opções
+            c = preferencias[proxima[aluno]]
+            proxima[aluno] += 1
+            d = disciplinas[c]
+            if d < 0 or vagas[d] <= 0:
+                livres.append(aluno)
+                continue
+            
+            propostas[c] = True
+            heap = heaps[d]
+            proposta = (medias[c], -c)
+            if len(heap) < vagas[d]:
+                heapq.heappush(heap, proposta)
+            elif proposta > heap[0]:
+                rejeitada = -heapq.heapreplace(heap, proposta)[1]
+                rejeitadas[d].append((-medias[rejeitada], rejeitada))
+                livres.append(alunos[rejeitada])
+            else:
+                rejeitadas[d].append((-medias[c], c))
+                livres.append(aluno)
+        
+        aceitos = np.array(sorted(-c for heap in heaps for _, c in heap), dtype=np.int64)
+        
+        # Rastreamento: posição no ranking completo da disciplina e nota de corte final
+        ordem = indice['ordem']
+        limites = indice['limites']
+        cod_ordenado = cod_disciplina[ordem]
+        posicao_rast = np.zeros(num_candidaturas, dtype=np.int64)
+        validas = cod_ordenado >= 0
+        posicao_rast[ordem[validas]] = (np.arange(len(ordem)) - limites[cod_ordenado.clip(0)] + 1)[validas]
+        
+        passos = [(0, 0, np.nan)] + [
+            (0, vagas[d], indice['medias'][-heap[0][1]] if heap and len(heap) == vagas[d] else np.nan)
+            for d, heap in enumerate(heaps)
         ]
+        passo_rast = np.where(propostas, cod_disciplina + 1, 0)
+        
+        for fila in rejeitadas:
+            heapq.heapify(fila)
+        filas = {'medias': medias, 'ocupantes': heaps, 'rejeitadas': rejeitadas, 'propostas': propostas,
+                 'preferencias': preferencias, 'inicio': inicio.tolist()}
+        return aceitos, passo_rast, posicao_rast, passos, filas
 
-        # Ordena por média classificatória
-        return sorted(candidatos_disciplina,
-                     key=lambda x: x['MEDIA_CLASSIFICATORIA'],
-                     reverse=True)
-
-    def processar_classificacoes(self):
-        todas_candidaturas = self.criar_candidaturas()
-        classificados = set()  # conjunto de alunos já classificados
-        resultado_final = {disc['DISCIPLINA']: [] for _, disc in self.vagas_df.iterrows()}
-        vagas_restantes = {row['DISCIPLINA']: row['VAGAS'] for _, row in self.vagas_df.iterrows()}
-
-        # FASE 1: Classificar apenas candidatos de 1ª opção que estejam bem ranqueados
-        for disciplina in vagas_restantes.keys():
-            if vagas_restantes[disciplina] > 0:
-                # Obtém ranking completo da disciplina
-                ranking = self.get_ranking_disciplina(todas_candidaturas, disciplina, classificados)
-
-                # Classifica apenas candidatos de 1ª opção dentro do número de vagas
-                for candidato in ranking[:vagas_restantes[disciplina]]:
-                    if candidato['OPCAO'] == 'PRIMEIRA OPCAO':
-                        resultado_final[disciplina].append(candidato)
-                        classificados.add(candidato['NOME'])
-                        vagas_restantes[disciplina] -= 1
-
-        # FASE 2: Classificar candidatos de 1ª e 2ª opção nas vagas remanescentes
-        for disciplina in vagas_restantes.keys():
-            if vagas_restantes[disciplina] > 0:
-                # Obtém novo ranking (sem os já classificados)
-                ranking = self.get_ranking_disciplina(todas_candidaturas, disciplina, classificados)
-
-                # Classifica candidatos de 1ª e 2ª opção
-                for candidato in ranking[:vagas_restantes[disciplina]]:
-                    if candidato['OPCAO'] in ['PRIMEIRA OPCAO', 'SEGUNDA OPCAO']:
-                        resultado_final[disciplina].append(candidato)
-                        classificados.add(candidato['NOME'])
-                        vagas_restantes[disciplina] -= 1
-
-        # FASE 3: Preencher vagas restantes com qualquer opção
-        for disciplina in vagas_restantes.keys():
-            if vagas_restantes[disciplina] > 0:
-                # Obtém ranking final (sem os já classificados)
-                ranking = self.get_ranking_disciplina(todas_candidaturas, disciplina, classificados)
-
-                # Classifica candidatos restantes
-                for candidato in ranking[:vagas_restantes[disciplina]]:
-                    resultado_final[disciplina].append(candidato)
-                    classificados.add(candidato['NOME'])
-                    vagas_restantes[disciplina] -= 1
-
-        # Criar DataFrame com resultados
-        linhas = []
-        for disciplina, classificados in resultado_final.items():
-            # Ordenar os classificados por média classificatória antes de adicionar ao DataFrame
-            classificados_ordenados = sorted(classificados,
-                                           key=lambda x: x['MEDIA_CLASSIFICATORIA'],
-                                           reverse=True)
-
-            for pos, aluno in enumerate(classificados_ordenados, 1):
-                linhas.append({
-                    'Disciplina': disciplina,
-                    'Posição': pos,
-                    'Nome': aluno['NOME'],
-                    'Matrícula': aluno['MATRICULA'],
-                    'Média Classificatória': round(aluno['MEDIA_CLASSIFICATORIA'], 4),
-                    'Opção': aluno['OPCAO'].replace(' OPCAO', ' OPÇÃO'),
-                    'Nota na Disciplina': aluno['NOTA_DISCIPLINA'],
-                    'Média Global': aluno['MEDIA_GLOBAL']
-                })
-
-        resultado_final_df = pd.DataFrame(linhas)
+    def comparar_modos(self, candidaturas, aceitos_tres_fases, aceitos_adiada):
+        # Uma linha por estudante classificado em pelo menos um dos modos
+        # (estudantes identificados pela linha da planilha de notas, como na alocação)
+        colunas = {}
+        for rotulo, aceitos in (('Três Fases', aceitos_tres_fases), ('Aceitação Adiada', aceitos_adiada)):
+            # Nas três fases, quem repete a disciplina em duas opções pode ocupar duas vagas dela
+            classificados = candidaturas.iloc[aceitos].drop_duplicates('LINHA_NOTAS').set_index('LINHA_NOTAS')
+            colunas[f'{rotulo}: Disciplina'] = classificados['DISCIPLINA']
+            colunas[f'{rotulo}: Opção'] = classificados['OPCAO'].str.replace(' OPCAO', ' OPÇÃO')
+        
+        comparacao = pd.DataFrame(colunas)
+        estudantes = candidaturas.drop_duplicates('LINHA_NOTAS').set_index('LINHA_NOTAS')
+        comparacao.insert(0, 'Nome', estudantes['NOME'].reindex(comparacao.index))
+        comparacao.insert(1, 'Matrícula', estudantes['MATRICULA'].reindex(comparacao.index))
+        comparacao['Alterado'] = np.where(
+            comparacao['Três Fases: Disciplina'].fillna('') == comparacao['Aceitação Adiada: Disciplina'].fillna(''),
+            'Não', 'Sim')
+        return comparacao.sort_values(['Alterado', 'Nome'], ascending=[False, True], ignore_index=True)
+
+    def iniciar_estado_alocacao(self, candidaturas, indice, aceitos, modo=MODO_TRES_FASES, filas=None):
+        # Estado mantido em memória para as chamadas seguintes (desistências e promoções)
+        vaga_do_aluno = np.full(indice['num_alunos'], -1, dtype=np.int64)
+        vaga_do_aluno[indice['cod_aluno'][aceitos]] = aceitos
+        sequencia = np.full(len(candidaturas), -1, dtype=np.int64)  # Ordem de aceitação
+        sequencia[aceitos] = np.arange(len(aceitos))
+        chamada = np.zeros(len(candidaturas), dtype=np.int64)  # Chamada em que foi aceita
+        chamada[aceitos] = 1
+        ocupadas = np.bincount(indice['cod_disciplina'][aceitos], minlength=len(indice['disciplinas']))
+        
+        return {
+            'modo': modo,
+            'candidaturas': candidaturas,
+            'indice': indice,
+            'vaga_do_aluno': vaga_do_aluno,
+            'indisponivel': vaga_do_aluno >= 0,  # Classificado ou desistente
+            'sequencia': sequencia,
+            'proxima_sequencia': len(aceitos),
+            'chamada_aceite': chamada,
+            'vagas_restantes': indice['vagas'] - ocupadas,
+            'cursor': np.zeros(len(indice['disciplinas']), dtype=np.int64),  # Início útil de cada fila
+            'filas': filas,  # Aceitação adiada: ocupantes e rejeitadas de cada disciplina
+            'pendentes': set(),  # Disciplinas com vagas liberadas desde a última chamada
+            'chamada': 1,
+            'desistencias': [],  # (chamada, candidatura ocupada ou -1, código do estudante)
+            'remanejamentos': [],  # (chamada, candidatura deixada, chamada em que tinha sido aceita)
+            'codigo_aluno': None  # Nome -> código do estudante, criado na primeira desistência
+        }
+
+    def registrar_desistencia(self, nome):
+        estado = self.estado_alocacao
+        indice = estado['indice']
+        if estado['codigo_aluno'] is None:
+            estado['codigo_aluno'] = dict(zip(estado['candidaturas']['NOME'], indice['cod_aluno'].tolist()))
+        
+        aluno = estado['codigo_aluno'].get(nome)
+        if aluno is None:
+            raise ValueError(f"Estudante \"{nome}\" não tem candidaturas no último processamento.")
+        if any(a == aluno for _, _, a in estado['desistencias']):
+            raise ValueError(f"A desistência de \"{nome}\" já foi registrada.")
+        
+        # Liberar a vaga ocupada (se houver) para a próxima chamada
+        vaga = estado['vaga_do_aluno'][aluno]
+        if vaga >= 0:
+            d = indice['cod_disciplina'][vaga]
+            estado['vagas_restantes'][d] += 1
+            estado['pendentes'].add(d)
+            estado['sequencia'][vaga] = -1
+            estado['vaga_do_aluno'][aluno] = -1
+        estado['indisponivel'][aluno] = True
+        estado['desistencias'].append((estado['chamada'] + 1, vaga, aluno))
+        
+        # O estudante sai de todas as filas; atualizar o rastreamento
+        self.rastreamento.loc[indice['cod_aluno'] == aluno, 'SITUACAO'] = SITUACOES_RASTREAMENTO.index(SITUACAO_DESISTENCIA)
+        return vaga >= 0
+
+    def realizar_chamada(self):
+        # Preenche as vagas liberadas pelas desistências seguindo as regras do modo processado
+        estado = self.estado_alocacao
+        liberadas = bool(estado['pendentes'])
+        # Na aceitação adiada, a saída de quem não tinha vaga ainda pode permitir trocas
+        trocas = estado['modo'] == MODO_ACEITACAO_ADIADA and any(
+            chamada > estado['chamada'] for chamada, _, _ in estado['desistencias'])
+        # Sem vagas liberadas não há chamada: o contador e o arquivo de saída ficam como estão
+        if not liberadas and not trocas:
+            raise ValueError("Nenhuma vaga foi liberada desde a última chamada. "
+                             "Registre as desistências antes de realizar uma nova chamada.")
+        
+        estado['chamada'] += 1
+        if estado['modo'] == MODO_ACEITACAO_ADIADA:
+            promovidos = self.promover_aceitacao_adiada()
+            if not liberadas and not len(promovidos):
+                estado['chamada'] -= 1
+                raise ValueError("As desistências registradas não liberaram vagas nem permitem remanejamentos. "
+                                 "Nenhuma chamada foi realizada.")
+        else:
+            promovidos = self.promover_tres_fases()
+        
+        aceitos = np.flatnonzero(estado['sequencia'] >= 0)
+        aceitos = aceitos[np.argsort(estado['sequencia'][aceitos])]
+        return self.montar_resultado(estado['candidaturas'], estado['indice'], aceitos), promovidos
+
+    def promover_tres_fases(self):
+        # Mesmas três fases do processamento, só nas disciplinas com vagas liberadas e sem
+        # mexer em quem já está classificado
+        estado = self.estado_alocacao
+        indice = estado['indice']
+        cod_aluno = indice['cod_aluno']
+        num_opcao = indice['num_opcao']
+        ordem = indice['ordem']
+        limites = indice['limites']
+        vagas_restantes = estado['vagas_restantes']
+        indisponivel = estado['indisponivel']
+        cursor = estado['cursor']
+        
+        promovidos = []
+        for fase in (1, 2, 3):
+            for d in sorted(estado['pendentes']):
+                if vagas_restantes[d] <= 0:
+                    continue
+                
+                fila = ordem[limites[d] + cursor[d]:limites[d + 1]]
+                disponivel = ~indisponivel[cod_aluno[fila]]
+                # Avançar o cursor sobre o início da fila que não concorre mais
+                cursor[d] += int(np.argmax(disponivel)) if disponivel.any() else len(fila)
+                topo = fila[disponivel][:vagas_restantes[d]]
+                aceitos = topo[num_opcao[topo] <= fase]
+                
+                indisponivel[cod_aluno[aceitos]] = True
+                estado['vaga_do_aluno'][cod_aluno[aceitos]] = aceitos
+                estado['sequencia'][aceitos] = estado['proxima_sequencia'] + np.arange(len(aceitos))
+                estado['proxima_sequencia'] += len(aceitos)
+                estado['chamada_aceite'][aceitos] = estado['chamada']
+                vagas_restantes[d] -= len(aceitos)
+                promovidos.append(aceitos)
+        estado['pendentes'] = set()
+        
+        promovidos = np.concatenate(promovidos) if promovidos else np.array([], dtype=np.int64)
+        if len(promovidos):
+            # Atualizar o rastreamento apenas dos estudantes promovidos
+            linhas_alunos = np.isin(cod_aluno, cod_aluno[promovidos])
+            self.rastreamento.loc[linhas_alunos, 'SITUACAO'] = SITUACOES_RASTREAMENTO.index(SITUACAO_OUTRA_DISCIPLINA)
+            self.rastreamento.loc[promovidos, 'SITUACAO'] = SITUACOES_RASTREAMENTO.index(SITUACAO_NESTA_DISCIPLINA)
+        return promovidos
+
+    def promover_aceitacao_adiada(self):
+        # Refaz a aceitação adiada sem os desistentes mexendo só nas disciplinas afetadas, com as
+        # filas guardadas no processamento. O resultado é o mesmo de refazer tudo do zero
+        estado = self.estado_alocacao
+        indice = estado['indice']
+        filas = estado['filas']
+        cod_aluno = indice['cod_aluno'].tolist()
+        cod_disciplina = indice['cod_disciplina'].tolist()
+        num_opcao = indice['num_opcao'].tolist()
+        vaga_do_aluno = estado['vaga_do_aluno']
+        vagas_restantes = estado['vagas_restantes']
+        desistentes = {aluno for _, _, aluno in estado['desistencias']}
+        
+        def melhor_rejeitada(d):
+            # Topo das rejeitadas da disciplina, descartando quem desistiu ou já tem uma opção
+            # preferida: como ninguém piora, essas candidaturas não voltam a querer a disciplina
+            rejeitadas = filas['rejeitadas'][d]
+            while rejeitadas:
+                c = rejeitadas[0][1]
+                atual = vaga_do_aluno[cod_aluno[c]]
+                if cod_aluno[c] not in desistentes and (atual < 0 or (num_opcao[c], c) < (num_opcao[atual], atual)):
+                    return c
+                heapq.heappop(rejeitadas)
+            return -1
+        
+        def preferidas(aluno, vaga):
+            # Disciplinas que o estudante prefere à vaga (todas, se ele não tem vaga)
+            opcoes = filas['preferencias'][filas['inicio'][aluno]:filas['inicio'][aluno + 1]]
+            if vaga >= 0:
+                opcoes = opcoes[:opcoes.index(vaga)]
+            return [cod_disciplina[c] for c in opcoes if cod_disciplina[c] >= 0]
+        
+        vaga_inicial = {}  # Vaga de cada estudante movido antes desta chamada
+        afetadas = set(estado['pendentes'])
+        # Disciplinas cuja melhor rejeitada pode ter mudado
+        revisar = set()
+        for chamada, vaga, aluno in estado['desistencias']:
+            if chamada == estado['chamada']:
+                revisar.update(preferidas(aluno, vaga))
+        
+        def mover(c, d):
+            aluno = cod_aluno[c]
+            atual = vaga_do_aluno[aluno]
+            heapq.heappop(filas['rejeitadas'][d])
+            heapq.heappush(filas['ocupantes'][d], (filas['medias'][c], -c))
+            vaga_inicial.setdefault(aluno, atual)
+            revisar.update(preferidas(aluno, atual))
+            vaga_do_aluno[aluno] = c
+            afetadas.add(d)
+            if atual >= 0:
+                afetadas.add(cod_disciplina[atual])
+            return atual
+        
+        # Cadeia de vagas: cada vaga liberada vai para a melhor rejeitada da disciplina,
+        # e a vaga que esse estudante deixa segue o mesmo caminho
+        livres = sorted(estado['pendentes'], reverse=True)
+        while livres:
+            d = livres.pop()
+            while vagas_restantes[d] > 0:
+                c = melhor_rejeitada(d)
+                if c < 0:
+                    break
+                atual = mover(c, d)
+                vagas_restantes[d] -= 1
+                if atual >= 0:
+                    vagas_restantes[cod_disciplina[atual]] += 1
+                    livres.append(cod_disciplina[atual])
+        
+        # Trocas: cada disciplina aponta para a disciplina da vaga atual da sua melhor rejeitada.
+        # Um ciclo nesse grafo é uma troca em que todos sobem para uma opção preferida sem passar
+        # à frente de ninguém com média maior; sem ciclos, nenhum estudante pode melhorar
+        while revisar:
+            melhor = {}
+            ciclos = []
+            visitadas = set()
+            for d in revisar:
+                caminho = {}
+                while d is not None and d not in visitadas:
+                    visitadas.add(d)
+                    caminho[d] = len(caminho)
+                    melhor[d] = melhor_rejeitada(d)
+                    atual = vaga_do_aluno[cod_aluno[melhor[d]]] if melhor[d] >= 0 else -1
+                    d = cod_disciplina[atual] if atual >= 0 else None
+                if d in caminho:
+                    ciclos.append(list(caminho)[caminho[d]:])
+            revisar = set()
+            for ciclo in ciclos:
+                for d in ciclo:
+                    mover(melhor[d], d)
+        
+        # Comparar só o início e o fim de cada estudante movido: quem subiu duas vezes
+        # na mesma chamada aparece uma vez
+        deixadas = np.array([v for a, v in vaga_inicial.items() if v >= 0 and vaga_do_aluno[a] != v], dtype=np.int64)
+        promovidos = np.array([vaga_do_aluno[a] for a, v in vaga_inicial.items() if vaga_do_aluno[a] != v],
+                              dtype=np.int64)
+        estado['remanejamentos'].extend(
+            (estado['chamada'], c, estado['chamada_aceite'][c]) for c in deixadas.tolist())
+        estado['chamada_aceite'][deixadas] = 0
+        estado['sequencia'][deixadas] = -1
+        estado['chamada_aceite'][promovidos] = estado['chamada']
+        estado['sequencia'][promovidos] = estado['proxima_sequencia'] + np.arange(len(promovidos))
+        estado['proxima_sequencia'] += len(promovidos)
+        estado['indisponivel'][indice['cod_aluno'][promovidos]] = True
+        estado['pendentes'] = set()
+        
+        self.atualizar_rastreamento_aceitacao_adiada(promovidos, afetadas)
+        return promovidos
+
+    def atualizar_rastreamento_aceitacao_adiada(self, promovidos, afetadas):
+        # Situação dos estudantes movidos e nota de corte das disciplinas que mudaram
+        estado = self.estado_alocacao
+        indice = estado['indice']
+        filas = estado['filas']
+        cod_aluno = indice['cod_aluno']
+        if len(promovidos):
+            linhas_alunos = np.isin(cod_aluno, cod_aluno[promovidos])
+            self.rastreamento.loc[linhas_alunos, 'SITUACAO'] = SITUACOES_RASTREAMENTO.index(SITUACAO_OUTRA_DISCIPLINA)
+            self.rastreamento.loc[promovidos, 'SITUACAO'] = SITUACOES_RASTREAMENTO.index(SITUACAO_NESTA_DISCIPLINA)
+        
+        linhas, cortes = [], []
+        for d in sorted(afetadas):
+            # Remover do topo os ocupantes que já saíram (desistentes ou remanejados)
+            ocupantes = filas['ocupantes'][d]
+            while ocupantes and estado['vaga_do_aluno'][cod_aluno[-ocupantes[0][1]]] != -ocupantes[0][1]:
+                heapq.heappop(ocupantes)
+            corte = indice['medias'][-ocupantes[0][1]] if ocupantes and estado['vagas_restantes'][d] == 0 else np.nan
+            candidaturas = indice['ordem'][indice['limites'][d]:indice['limites'][d + 1]]
+            linhas.append(candidaturas[filas['propostas'][candidaturas]])
+            cortes.append(np.full(len(linhas[-1]), corte))
+        if linhas:
+            self.rastreamento.loc[np.concatenate(linhas), 'NOTA_CORTE'] = np.concatenate(cortes)
 
+    def tabela_chamadas(self, estado=None):
+        # Histórico: classificações de cada chamada, desistências e remanejamentos
+        if estado is None:
+            estado = self.estado_alocacao
+        candidaturas = estado['candidaturas']
+        
+        classificacoes = np.flatnonzero(estado['chamada_aceite'] > 0)
+        movimentos = [pd.DataFrame({
+            'Chamada': estado['chamada_aceite'][classificacoes],
+            'Movimento': 'Classificação',
+            'Linha': classificacoes
+        })]
+        if estado['desistencias']:
+            chamadas, vagas, alunos = zip(*estado['desistencias'])
+            # Desistentes sem vaga aparecem com a primeira candidatura deles
+            primeira = pd.Series(np.arange(len(candidaturas))).groupby(estado['indice']['cod_aluno']).first()
+            linhas = [v if v >= 0 else primeira[a] for v, a in zip(vagas, alunos)]
+            movimentos.append(pd.DataFrame({'Chamada': chamadas, 'Movimento': 'Desistência', 'Linha': linhas}))
+        if estado['remanejamentos']:
+            # Aceitação adiada: a vaga deixada aparece na chamada em que foi obtida e na do remanejamento
+            chamadas, linhas, chamadas_aceite = zip(*estado['remanejamentos'])
+            movimentos.append(pd.DataFrame({'Chamada': chamadas_aceite, 'Movimento': 'Classificação', 'Linha': linhas}))
+            movimentos.append(pd.DataFrame({'Chamada': chamadas, 'Movimento': 'Remanejamento', 'Linha': linhas}))
+        movimentos = pd.concat(movimentos, ignore_index=True)
+        
+        linhas = candidaturas.iloc[movimentos['Linha'].to_numpy()]
+        tabela = pd.DataFrame({
+            'Chamada': movimentos['Chamada'].to_numpy(),
+            'Movimento': movimentos['Movimento'].to_numpy(),
+            'Disciplina': linhas['DISCIPLINA'].to_numpy(),
+            'Nome': linhas['NOME'].to_numpy(),
+            'Matrícula': linhas['MATRICULA'].to_numpy(),
+            'Média Classificatória': linhas['MEDIA_CLASSIFICATORIA'].round(4).to_numpy(),
+            'Opção': linhas['OPCAO'].str.replace(' OPCAO', ' OPÇÃO').to_numpy()
+        })
+        return tabela.sort_values(['Chamada', 'Movimento', 'Disciplina'], ascending=[True, False, True],
+                                  ignore_index=True)
+
+    def montar_resultado(self, candidaturas, indice, aceitos):
+        # Classificados de cada disciplina ordenados por média; empates na ordem de aceitação
+        cod_disciplina = indice['cod_disciplina'][aceitos]
+        ordem = np.lexsort((np.arange(len(aceitos)), -indice['medias'][aceitos], cod_disciplina))
+        aceitos = aceitos[ordem]
+        cod_disciplina = cod_disciplina[ordem]
+        inicio_disciplina = np.searchsorted(cod_disciplina, cod_disciplina)
+        
+        classificados = candidaturas.iloc[aceitos]
+        resultado_final_df = pd.DataFrame({
+            'Disciplina': classificados['DISCIPLINA'].to_numpy(),
+            'Posição': np.arange(len(aceitos)) - inicio_disciplina + 1,
+            'Nome': classificados['NOME'].to_numpy(),
+            'Matrícula': classificados['MATRICULA'].to_numpy(),
+            'Média Classificatória': [round(media, 4) for media in classificados['MEDIA_CLASSIFICATORIA']],
+            'Opção': classificados['OPCAO'].str.replace(' OPCAO', ' OPÇÃO').to_numpy(),
+            'Nota na Disciplina': classificados['NOTA_DISCIPLINA'].to_numpy(),
+            'Média Global': classificados['MEDIA_GLOBAL'].to_numpy()
+        })
+        
         # Ordenar o DataFrame por Disciplina e Posição
         resultado_final_df = resultado_final_df.sort_values(['Disciplina', 'Posição'])
         
         return resultado_final_df
 
+    def montar_rastreamento(self, indice, aceitos, passo_rast, posicao_rast, passos):
+        # Apenas colunas numéricas, alinhadas às linhas da tabela de candidaturas processada
+        considerada = passo_rast > 0
+        aluno_classificado = np.zeros(indice['num_alunos'], dtype=bool)
+        aluno_classificado[indice['cod_aluno'][aceitos]] = True
+        fases, vagas_passo, cortes = (np.array(coluna) for coluna in zip(*passos))
+        vagas = vagas_passo[passo_rast]
+        
+        # Situação final de cada candidatura, da mais para a menos prioritária
+        aceita = np.zeros(len(passo_rast), dtype=bool)
+        aceita[aceitos] = True
+        situacao = np.select(
+            [aceita,
+             aluno_classificado[indice['cod_aluno']],
+             indice['cod_disciplina'] < 0,
+             ~considerada,
+             posicao_rast > vagas],
+            [0, 1, 2, 3, 4],
+            default=5
+        ).astype(np.int8)
+        
+        return pd.DataFrame({
+            'FASE': fases[passo_rast].astype(np.int8),
+            'POSICAO': posicao_rast,
+            'VAGAS_FASE': vagas,
+            'NOTA_CORTE': cortes[passo_rast],
+            'SITUACAO': situacao
+        })
+
+    def tabela_rastreamento(self, linhas=None, processamento=None):
+        # Tabela legível do rastreamento (todas as candidaturas ou apenas as linhas indicadas)
+        if processamento is None:
+            processamento = self.processamento_atual()
+        candidaturas = processamento['candidaturas']
+        rastreamento = processamento['rastreamento']
+        if linhas is not None:
+            candidaturas = candidaturas.iloc[linhas]
+            rastreamento = rastreamento.iloc[linhas]
+        
+        return pd.DataFrame({
+            'Nome': candidaturas['NOME'].to_numpy(),
+            'Matrícula': candidaturas['MATRICULA'].to_numpy(),
+            'Disciplina': candidaturas['DISCIPLINA'].to_numpy(),
+            'Opção': candidaturas['OPCAO'].str.replace(' OPCAO', ' OPÇÃO').to_numpy(),
+            'Média Classificatória': candidaturas['MEDIA_CLASSIFICATORIA'].round(4).to_numpy(),
+            # A aceitação adiada não tem fases: a coluna fica vazia
+            'Fase': (rastreamento['FASE'].to_numpy() if processamento['estado_alocacao']['modo'] == MODO_TRES_FASES
+                     else None),
+            'Posição na Fase': rastreamento['POSICAO'].to_numpy(),
+            'Vagas na Fase': rastreamento['VAGAS_FASE'].to_numpy(),
+            'Nota de Corte': rastreamento['NOTA_CORTE'].round(4).to_numpy(),
+            'Situação': np.asarray(SITUACOES_RASTREAMENTO, dtype=object)[rastreamento['SITUACAO'].to_numpy()]
+        })
+
+    def consultar_rastreamento(self, nome):
+        # Índice nome -> linhas do rastreamento, criado na primeira consulta; inclui as
+        # candidaturas feitas com outra grafia do nome do mesmo estudante
+        if self.rastreamento_indice is None:
+            candidaturas = self.candidaturas_processadas
+            por_estudante = candidaturas.groupby('LINHA_NOTAS', sort=False).indices
+            self.rastreamento_indice = {nome: por_estudante[linha] for nome, linha in
+                                        dict(zip(candidaturas['NOME'], candidaturas['LINHA_NOTAS'])).items()}
+        return self.tabela_rastreamento(self.rastreamento_indice.get(nome, []))
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MonitoriaApp()